@@ -36,6 +36,7 @@ class GraphBuilder:
         self.data_tools = DataProcessingTools()
         self.saver = ExcelSaver()
         self.system_prompt = "You are a helpful data agent."
+        self.app = None
 
 
 
@@ -44,7 +45,8 @@ class GraphBuilder:
     def agent_function(self, state: dict):
         """Main agent function to run the workflow graph."""
         # state should be a dict with at least 'file_path'
-        workflow = self.build_graph()
+        # The graph is compiled once and reused for every run
+        workflow = self.app if self.app is not None else self.build_graph()
         result = workflow.invoke(state)
         return result
     
@@ -56,7 +58,7 @@ class GraphBuilder:
 
     def ingest_data(self, state: AgentState):
        
-        return Ingest_clean_data(state)
+        return Ingest_clean_data.ingest_data(state)
 
 
 
@@ -86,14 +88,12 @@ class GraphBuilder:
         workflow.add_edge("ingest_data", "clean_and_validate_data")
         workflow.add_edge("clean_and_validate_data", "validate_data")
 
-        # Add a counter to state to track validation attempts
+        # validate_data counts attempts and reports whether it produced new
+        # cleaning instructions; re-cleaning without them cannot converge.
         def validation_decision(state):
             if state.get("is_valid"):
                 return "is_valid"
-            # Track number of validation attempts
-            attempts = state.get("validation_attempts", 0) + 1
-            state["validation_attempts"] = attempts
-            if attempts >= 2:
+            if state.get("validation_attempts", 0) >= 2 or not state.get("has_new_instructions"):
                 return "escalate"
             return "needs_reprocessing"
 
@@ -0,0 +1,11 @@
+VALIDATION_PROMPT = """
+You are a data quality expert. Given the following data sample (in JSON), identify any data quality issues (missing columns, missing values, duplicates, wrong types, etc.).
+Columns in the sample: {columns}
+
+Return a verdict and the cleaning instructions that fix the blocking issues. Only reference columns listed above.
+Instructions are applied to the raw file in this order: rename_columns, drop_columns, fill_na, cast_columns.
+Set is_valid to true and leave cleaning_instructions empty when there is nothing to fix.
+
+Data sample:
+{sample_json}
+"""
@@ -0,0 +1,52 @@
+"""
+Run the ingestion service:  python -m service [--port 8000] [--workers 2] [--watch] [--memory-budget-mb 2048]
+"""
+import argparse
+
+import uvicorn
+
+from service.app import create_app
+from service.ingestion_service import IngestionService
+from service.job_queue import JobQueue
+from service.memory_scheduler import MB, MemoryScheduler, PeakMemoryMonitor
+from utilits.config_loader import load_config
+
+
+def main():
+    full_config = load_config()
+    config = full_config.get("service", {})
+    watch_config = full_config.get("watch", {})
+    scheduler_config = full_config.get("scheduler", {})
+    parser = argparse.ArgumentParser(description="Long-running data ingestion service")
+    parser.add_argument("--host", default=config.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=config.get("port", 8000))
+    parser.add_argument("--workers", type=int, default=config.get("workers", 2))
+    parser.add_argument("--queue-path", default=config.get("queue_path", ".ingest_state/jobs.db"))
+    parser.add_argument("--watch", action="store_true", default=watch_config.get("enabled", False),
+                        help="Ingest files dropped into the watch directory automatically")
+    parser.add_argument("--memory-budget-mb", type=int, default=scheduler_config.get("memory_budget_mb", 2048))
+    args = parser.parse_args()
+
+    scheduler = MemoryScheduler(
+        budget_bytes=args.memory_budget_mb * MB,
+        streaming_fraction=scheduler_config.get("streaming_fraction", 0.5),
+        chunk_fraction=scheduler_config.get("chunk_fraction", 0.1),
+        intake_factor=scheduler_config.get("intake_factor", 4.0),
+    )
+    monitor = PeakMemoryMonitor(trace_allocations=scheduler_config.get("trace_allocations", False))
+    service = IngestionService(JobQueue(args.queue_path), workers=args.workers, scheduler=scheduler, monitor=monitor)
+    if args.watch:
+        service.watch(
+            watch_config.get("directory", "INPUT_FILES"),
+            incremental=watch_config.get("incremental", False),
+            settle_seconds=watch_config.get("settle_seconds", 2.0),
+            batch_window_seconds=watch_config.get("batch_window_seconds", 1.0),
+            poll_interval=watch_config.get("poll_interval_seconds", 1.0),
+            retry_seconds=watch_config.get("retry_seconds", 30.0),
+        )
+    # A single server process: the warm workers live in this process
+    uvicorn.run(create_app(service), host=args.host, port=args.port, lifespan="on")
+
+
+if __name__ == "__main__":
+    main()
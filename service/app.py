@@ -0,0 +1,87 @@
+"""
+Local HTTP API for the ingestion service.
+
+A plain ASGI application served by uvicorn:
+
+    POST /jobs          {"file_path": "...", "options": {...}}  -> {"job_id": "..."}, 429 when intake is paused
+                        options: "incremental" (bool), "cleaning_instructions" (object)
+    GET  /jobs          ?status=queued                          -> list of jobs
+    GET  /jobs/<id>                                             -> job status
+    GET  /metrics                                               -> queue, worker and memory metrics
+    GET  /health
+"""
+import json
+from urllib.parse import parse_qs
+
+from service.ingestion_service import IngestionService
+from service.memory_scheduler import BackpressureError
+
+
+async def _read_body(receive) -> bytes:
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            return body
+
+
+async def _send_json(send, status: int, payload, headers: list = None):
+    body = json.dumps(payload, default=str).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        + (headers or []),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_app(service: IngestionService):
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    service.start()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    service.stop()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"].rstrip("/")
+        query = parse_qs(scope.get("query_string", b"").decode())
+
+        if method == "GET" and path == "/health":
+            return await _send_json(send, 200, {"status": "ok", "ready": service.graph is not None})
+        if method == "GET" and path == "/metrics":
+            return await _send_json(send, 200, service.metrics())
+        if method == "POST" and path == "/jobs":
+            try:
+                payload = json.loads(await _read_body(receive) or b"{}")
+                file_path = payload["file_path"]
+            except (ValueError, KeyError, TypeError):
+                return await _send_json(send, 400, {"error": "Body must be JSON with a 'file_path' field"})
+            try:
+                job_id = service.submit(file_path, payload.get("options"))
+            except FileNotFoundError:
+                return await _send_json(send, 404, {"error": f"Input file not found: {file_path}"})
+            except ValueError as e:
+                # Invalid options, or an input the sniffer cannot handle
+                return await _send_json(send, 400, {"error": str(e)})
+            except BackpressureError as e:
+                return await _send_json(send, 429, {"error": str(e)}, headers=[(b"retry-after", b"30")])
+            return await _send_json(send, 202, {"job_id": job_id, "status": "queued"})
+        if method == "GET" and path == "/jobs":
+            return await _send_json(send, 200, service.queue.list(status=query.get("status", [None])[0]))
+        if method == "GET" and path.startswith("/jobs/"):
+            job = service.queue.get(path[len("/jobs/"):])
+            if job is None:
+                return await _send_json(send, 404, {"error": "Job not found"})
+            return await _send_json(send, 200, job)
+        return await _send_json(send, 404, {"error": f"No route for {method} {path}"})
+
+    return app
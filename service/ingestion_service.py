@@ -0,0 +1,255 @@
+"""
+Resident ingestion service: the graph is compiled once and shared by a pool
+of warm worker threads that drain the persistent job queue. A memory
+scheduler decides how many jobs may hold data in memory at the same time,
+and a monitor measures the peak each job actually reached.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from typing import Optional
+
+from service.job_queue import JobQueue
+from service.memory_scheduler import BackpressureError, MemoryScheduler, PeakMemoryMonitor
+from tools.Logging_report import RunReport
+from tools.Validation_schema import CleaningInstructions
+from service.watcher import DirectoryWatcher
+
+
+# Options a client may set on a job; anything else in the graph state is
+# owned by the service or the graph itself.
+JOB_OPTIONS = ("incremental", "cleaning_instructions")
+
+
+def validate_job_options(options) -> dict:
+    """Checks client-supplied job options, raising ValueError for anything unexpected."""
+    if options is None:
+        return {}
+    if not isinstance(options, dict):
+        raise ValueError("'options' must be a JSON object")
+    unknown = sorted(set(options) - set(JOB_OPTIONS))
+    if unknown:
+        raise ValueError(f"Unsupported job option(s): {', '.join(unknown)}; allowed: {', '.join(JOB_OPTIONS)}")
+    validated = {}
+    if "incremental" in options:
+        if not isinstance(options["incremental"], bool):
+            raise ValueError("'incremental' must be true or false")
+        validated["incremental"] = options["incremental"]
+    if options.get("cleaning_instructions") is not None:
+        # pydantic's ValidationError is a ValueError
+        validated["cleaning_instructions"] = CleaningInstructions.model_validate(
+            options["cleaning_instructions"]
+        ).model_dump()
+    return validated
+
+
+class IngestionService:
+    def __init__(
+        self,
+        queue: JobQueue,
+        workers: int = 2,
+        model_provider: str = "openai",
+        poll_interval: float = 1.0,
+        scheduler: Optional[MemoryScheduler] = None,
+        monitor: Optional[PeakMemoryMonitor] = None,
+    ):
+        self.queue = queue
+        self.scheduler = scheduler or MemoryScheduler()
+        self.monitor = monitor or PeakMemoryMonitor()
+        self.report = RunReport()
+        self.workers = workers
+        self.model_provider = model_provider
+        self.poll_interval = poll_interval
+        self.graph = None
+        self.started_at = None
+        self.threads = []
+        self.in_flight = 0
+        self.durations = deque(maxlen=500)
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.watcher = None
+        self.watch_job_options = {}
+
+    def start(self):
+        """Pay the start-up costs once: imports, config, LLM clients and graph compilation."""
+        from agent.agent_workflow import GraphBuilder
+
+        print("---STARTING INGESTION SERVICE---")
+        self.builder = GraphBuilder(model_provider=self.model_provider)
+        self.graph = self.builder.build_graph()
+        self.started_at = time.time()
+        self.monitor.start()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"ingest-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"Ingestion service ready with {self.workers} worker(s).")
+        if self.watcher is not None:
+            self.watcher.start()
+
+    def stop(self, timeout: float = 30.0):
+        if self.watcher is not None:
+            self.watcher.stop()
+        self.stopping.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.monitor.stop()
+
+    def submit(
+        self, file_path: str, options: Optional[dict] = None, block: bool = False, metadata: Optional[dict] = None
+    ) -> str:
+        """
+        Queue a file for ingestion. `options` are checked against JOB_OPTIONS
+        (ValueError when invalid); `metadata` is stored with the job but never
+        reaches the graph. When the queued work exceeds the intake budget,
+        raises BackpressureError, or waits for the queue to drain when `block`
+        is set.
+        """
+        if not isinstance(file_path, str) or not file_path:
+            raise ValueError("'file_path' must be a non-empty string")
+        # Relative paths are resolved against INPUT_FILES, like the ingest node does
+        if not os.path.isabs(file_path) and not file_path.startswith("INPUT_FILES"):
+            file_path = os.path.join("INPUT_FILES", file_path)
+        options = {**validate_job_options(options), **(metadata or {})}
+        options["estimate"] = self.scheduler.estimate(file_path, options)
+        while True:
+            try:
+                self.scheduler.check_intake(self.queue.queued_bytes(), options["estimate"])
+                break
+            except BackpressureError:
+                if not block or self.stopping.is_set():
+                    raise
+                time.sleep(self.poll_interval)
+        job_id = self.queue.submit(file_path, options)
+        self.wakeup.set()
+        return job_id
+
+    def watch(self, directory: str = "INPUT_FILES", incremental: bool = False, **watcher_options):
+        """
+        Queue files dropped into `directory` automatically once the service starts.
+        With `incremental`, files that grow are re-queued as delta runs.
+        """
+        self.watch_job_options = {"incremental": incremental}
+        self.watcher = DirectoryWatcher(directory, self.submit_batch, **watcher_options)
+
+    def submit_batch(self, file_paths: list) -> list:
+        """
+        Queue a batch of files from watch mode. Versions of a file that were
+        already queued (e.g. seen again after a restart) are skipped. A file
+        that cannot be queued does not stop the rest of the batch; the paths
+        that failed are returned so the watcher can retry them.
+        """
+        batch_id = uuid.uuid4().hex
+        failed = []
+        for path in file_paths:
+            try:
+                stat = os.stat(path)
+                signature = [stat.st_size, stat.st_mtime_ns]
+                if self.queue.has_job(path, signature):
+                    continue
+                metadata = {"batch_id": batch_id, "signature": signature}
+                # Watch mode waits out backpressure instead of dropping files
+                self.submit(path, self.watch_job_options, block=True, metadata=metadata)
+            except FileNotFoundError:
+                print(f"Watch mode: {path} disappeared before it could be queued.")
+            except Exception as e:
+                print(f"Watch mode: could not queue {path}: {e}")
+                failed.append(path)
+        return failed
+
+    def _worker_loop(self):
+        while not self.stopping.is_set():
+            job = self.queue.claim()
+            if job is None:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+            self.run_scheduled(job)
+
+    def run_scheduled(self, job: dict):
+        """Admit the job against the memory budget, run it, then release its share."""
+        try:
+            # Re-estimate at run time: the file may have grown since it was queued
+            estimate = self.scheduler.estimate(job["file_path"], job["options"])
+        except Exception:
+            estimate = job["options"].get("estimate") or {"mode": "in_memory", "estimated_bytes": 0, "input_bytes": 0}
+        if not self.scheduler.admit(estimate, self.stopping):
+            return
+        metrics = {}
+        try:
+            metrics = self.run_job(job, estimate)
+        finally:
+            # A peak measured alongside other jobs includes their memory too
+            observed = None if metrics.get("peak_overlapped") else metrics.get("observed_peak_bytes")
+            self.scheduler.release(estimate, observed)
+
+    def run_job(self, job: dict, estimate: Optional[dict] = None) -> dict:
+        estimate = estimate or {"mode": "in_memory"}
+        print(f"---RUNNING JOB {job['id']} ({job['file_path']}, {estimate['mode']})---")
+        with self.lock:
+            self.in_flight += 1
+        started = time.monotonic()
+        metrics = {"mode": estimate["mode"], "estimated_peak_bytes": estimate.get("estimated_bytes")}
+        status = "failed"
+        try:
+            state = {"file_path": job["file_path"], "job_id": job["id"]}
+            state.update({key: job["options"][key] for key in JOB_OPTIONS if key in job["options"]})
+            if estimate["mode"] == "streaming":
+                state["chunksize"] = estimate["chunksize"]
+            token = self.monitor.begin()
+            try:
+                result = self.graph.invoke(state)
+            finally:
+                metrics.update(self.monitor.end(token))
+            cleaned = result.get("cleaned_data")
+            metrics.update(
+                duration_seconds=round(time.monotonic() - started, 3),
+                # In streaming mode cleaned_data is only the first chunk
+                rows_cleaned=int(result.get("rows_written", len(cleaned) if cleaned is not None else 0)),
+                validation_attempts=result.get("validation_attempts", 0),
+                output_path=result.get("output_path"),
+            )
+            status = "succeeded" if result.get("is_valid") else "needs_review"
+            self.queue.finish(job["id"], status, outcome=result.get("agent_outcome"), metrics=metrics)
+        except Exception as e:
+            traceback.print_exc()
+            metrics["duration_seconds"] = round(time.monotonic() - started, 3)
+            self.queue.finish(job["id"], "failed", error=str(e), metrics=metrics)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+                self.durations.append(time.monotonic() - started)
+            self.report.record({"job_id": job["id"], "file_path": job["file_path"], "status": status, **metrics})
+        return metrics
+
+    def metrics(self) -> dict:
+        with self.lock:
+            durations = sorted(self.durations)
+            in_flight = self.in_flight
+
+        def percentile(q):
+            if not durations:
+                return None
+            return round(durations[min(len(durations) - 1, int(round(q * (len(durations) - 1))))], 3)
+
+        metrics = {
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0,
+            "workers": self.workers,
+            "in_flight": in_flight,
+            "jobs": self.queue.counts(),
+            "watching": self.watcher.directory if self.watcher is not None else None,
+            "memory": {**self.scheduler.snapshot(), "queued_bytes": self.queue.queued_bytes()},
+            "job_duration_p50_seconds": percentile(0.50),
+            "job_duration_p95_seconds": percentile(0.95),
+        }
+        try:
+            from tools.Validation_cleaning_data import llm
+            metrics["llm"] = llm.snapshot()
+        except Exception:
+            pass
+        return metrics
@@ -0,0 +1,136 @@
+"""
+Persistent ingestion job queue backed by SQLite.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+
+class JobQueue:
+    """
+    FIFO job queue stored in a SQLite file, so queued and finished jobs
+    survive a service restart. Jobs left 'running' by a crash are re-queued
+    on startup.
+    """
+
+    def __init__(self, db_path: str = ".ingest_state/jobs.db"):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                file_path TEXT NOT NULL,
+                options TEXT NOT NULL DEFAULT '{}',
+                status TEXT NOT NULL,
+                submitted_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                outcome TEXT,
+                error TEXT,
+                metrics TEXT
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_file ON jobs (status, file_path)")
+        requeued = self.conn.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'"
+        ).rowcount
+        if requeued:
+            print(f"Re-queued {requeued} interrupted job(s).")
+
+    def submit(self, file_path: str, options: Optional[dict] = None) -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO jobs (id, file_path, options, status, submitted_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, file_path, json.dumps(options or {}), time.time()),
+            )
+        return job_id
+
+    def claim(self) -> Optional[dict]:
+        """
+        Atomically move the oldest queued job to 'running' and return it.
+        Jobs for a file that another job is still processing are passed over,
+        so runs on the same file (and its watermark and output) never overlap.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' AND file_path NOT IN "
+                    "(SELECT file_path FROM jobs WHERE status = 'running') ORDER BY submitted_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                started_at = time.time()
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (started_at, row["id"])
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        job.update(status="running", started_at=started_at)
+        return job
+
+    def finish(self, job_id: str, status: str, outcome: str = None, error: str = None, metrics: dict = None):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, outcome = ?, error = ?, metrics = ? WHERE id = ?",
+                (status, time.time(), outcome, error, json.dumps(metrics or {}), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> list:
+        query, params = "SELECT * FROM jobs", ()
+        if status:
+            query, params = query + " WHERE status = ?", (status,)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY submitted_at DESC LIMIT ?", (*params, limit)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def has_job(self, file_path: str, signature: list) -> bool:
+        """True when this exact version of the file was already queued or processed."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM jobs WHERE file_path = ? AND json_extract(options, '$.signature') = json(?) "
+                "AND status != 'failed' LIMIT 1",
+                (file_path, json.dumps(signature)),
+            ).fetchone()
+        return row is not None
+
+    def queued_bytes(self) -> int:
+        """Sum of the scheduler's memory estimates over jobs still waiting."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COALESCE(SUM(json_extract(options, '$.estimate.estimated_bytes')), 0) "
+                "FROM jobs WHERE status = 'queued'"
+            ).fetchone()
+        return int(row[0])
+
+    def counts(self) -> dict:
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["metrics"] = json.loads(job["metrics"]) if job.get("metrics") else {}
+        return job
@@ -0,0 +1,295 @@
+"""
+Memory-budget scheduling for concurrently processed files.
+
+Each job's peak memory is estimated before it runs, from the input size,
+its format and compression, and the peaks observed for files with the same
+schema in earlier runs. Jobs are only admitted while the sum of running
+estimates fits the global budget; inputs too large for the budget are
+switched to chunked streaming, and intake is refused once the queued work
+would take too long to drain. The real peak of every job is measured while
+it runs and fed back into the per-schema estimates.
+"""
+import hashlib
+import itertools
+import json
+import os
+import threading
+import tracemalloc
+from typing import Optional
+
+from utilits.file_sniffer import STREAMABLE_FORMATS, open_stream, sniff_format
+
+MB = 1024 * 1024
+
+# In-memory size of a parsed frame relative to the uncompressed input
+FORMAT_EXPANSION = {"csv": 3.0, "jsonl": 3.0, "json": 4.0, "excel": 6.0, "parquet": 5.0}
+# Uncompressed size relative to the compressed input
+COMPRESSION_RATIO = {None: 1.0, "gzip": 4.0, "zip": 4.0, "zstd": 4.0, "bz2": 5.0, "xz": 6.0}
+# Cleaning holds the input frame and the surviving rows at once
+CLEANING_OVERHEAD = 2.0
+SCHEMA_CACHE_MARGIN = 1.2
+# Fixed overheads dominate tiny files, so they do not teach the cache anything
+MIN_CACHED_INPUT_BYTES = 1 * MB
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes() -> int:
+    """Resident set size of this process; 0 where /proc is not available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class BackpressureError(Exception):
+    """Raised when intake is refused because queued work exceeds the intake budget."""
+
+
+class SchemaCache:
+    """Observed peak-to-input ratios per file schema, persisted as JSON."""
+
+    def __init__(self, path: str = ".ingest_state/schema_cache.json"):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.ratios = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.ratios = {}
+
+    def get(self, key: str) -> Optional[float]:
+        return self.ratios.get(key)
+
+    def update(self, key: str, ratio: float):
+        with self.lock:
+            previous = self.ratios.get(key)
+            # Keep a moving average so one odd file does not dominate
+            self.ratios[key] = ratio if previous is None else 0.7 * previous + 0.3 * ratio
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w") as f:
+                json.dump(self.ratios, f, indent=2)
+
+
+class PeakMemoryMonitor:
+    """
+    Measures the peak memory of each running job, relative to what the
+    process held when the job started, from the process RSS sampled in a
+    background thread. Sampling is cheap but can miss spikes shorter than
+    the interval. With `trace_allocations` the tracemalloc peak, which
+    catches every traced allocation however short, is combined with it;
+    tracing slows allocation-heavy pandas code several times over, so it
+    is meant for debugging estimates, not for production runs.
+
+    Jobs that ran alongside others are flagged as overlapped, since their
+    measurement includes the other jobs' memory.
+    """
+
+    def __init__(self, sample_interval: float = 0.05, trace_allocations: bool = False):
+        self.sample_interval = sample_interval
+        self.trace_allocations = trace_allocations
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.tokens = itertools.count()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.started_tracing = False
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self._run, name="memory-monitor", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def _run(self):
+        while not self.stopping.wait(self.sample_interval):
+            self._sample()
+
+    def _sample(self):
+        with self.lock:
+            if not self.jobs:
+                return
+            traced_peak = 0
+            if tracemalloc.is_tracing():
+                traced_peak = tracemalloc.get_traced_memory()[1]
+                # Peaks are collected per interval; only this lock resets them
+                tracemalloc.reset_peak()
+            rss = _rss_bytes()
+            for job in self.jobs.values():
+                job["peak"] = max(
+                    job["peak"],
+                    traced_peak - job["traced_baseline"] if traced_peak else 0,
+                    rss - job["rss_baseline"] if rss else 0,
+                )
+
+    def begin(self) -> int:
+        """Start measuring a job; returns the token to pass to `end`."""
+        self._sample()
+        with self.lock:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            overlapped = bool(self.jobs)
+            for job in self.jobs.values():
+                job["overlapped"] = True
+            token = next(self.tokens)
+            self.jobs[token] = {
+                "traced_baseline": tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0,
+                "rss_baseline": _rss_bytes(),
+                "peak": 0,
+                "overlapped": overlapped,
+            }
+        return token
+
+    def end(self, token: int) -> dict:
+        """Stop measuring a job and return its observed peak."""
+        self._sample()
+        with self.lock:
+            job = self.jobs.pop(token)
+        return {"observed_peak_bytes": int(job["peak"]), "peak_overlapped": job["overlapped"]}
+
+
+class MemoryScheduler:
+    def __init__(
+        self,
+        budget_bytes: int = 2048 * MB,
+        streaming_fraction: float = 0.5,
+        chunk_fraction: float = 0.1,
+        intake_factor: float = 4.0,
+        schema_cache: Optional[SchemaCache] = None,
+    ):
+        self.budget_bytes = budget_bytes
+        self.streaming_fraction = streaming_fraction
+        self.chunk_fraction = chunk_fraction
+        self.intake_bytes = int(budget_bytes * intake_factor)
+        self.schema_cache = schema_cache or SchemaCache()
+        self.in_use = 0
+        self.running = 0
+        self.condition = threading.Condition()
+
+    @staticmethod
+    def _schema_key(file_path: str, fmt) -> str:
+        """Format plus the first line of the decompressed content."""
+        try:
+            with open_stream(file_path, fmt.compression, fmt.zip_member) as stream:
+                first_line = stream.readline(4096) if fmt.format in STREAMABLE_FORMATS else b""
+        except Exception:
+            first_line = b""
+        return fmt.format + ":" + hashlib.sha1(first_line).hexdigest()
+
+    def estimate(self, file_path: str, options: Optional[dict] = None) -> dict:
+        """
+        Estimate the peak memory of a job and decide how it should run:
+        'in_memory', 'streaming' (with a chunk size in rows) or 'exclusive'
+        for oversized inputs that cannot be streamed.
+        """
+        options = options or {}
+        input_bytes = os.path.getsize(file_path)
+        fmt = sniff_format(file_path)
+
+        if options.get("incremental") and fmt.compression is None and fmt.format in STREAMABLE_FORMATS:
+            # Delta runs only parse what was appended since the watermark
+            from tools.Delta_ingest import WatermarkStore
+            watermark = WatermarkStore().get(file_path)
+            if watermark is not None and watermark["byte_offset"] <= input_bytes:
+                input_bytes -= watermark["byte_offset"]
+
+        schema_key = self._schema_key(file_path, fmt)
+        uncompressed = input_bytes * COMPRESSION_RATIO.get(fmt.compression, 4.0)
+        cached_ratio = self.schema_cache.get(schema_key)
+        if cached_ratio is not None:
+            ratio, source = cached_ratio * SCHEMA_CACHE_MARGIN, "schema_cache"
+        else:
+            ratio, source = FORMAT_EXPANSION.get(fmt.format, 4.0) * CLEANING_OVERHEAD, "format"
+        estimated = int(uncompressed * ratio)
+
+        estimate = {
+            "input_bytes": input_bytes,
+            "format": fmt.format,
+            "compression": fmt.compression,
+            "schema_key": schema_key,
+            "estimate_source": source,
+            "estimated_bytes": estimated,
+            "mode": "in_memory",
+        }
+        if estimated > self.budget_bytes * self.streaming_fraction and not options.get("incremental"):
+            if fmt.format in STREAMABLE_FORMATS:
+                estimate.update(self._streaming_plan(file_path, fmt, uncompressed, estimated))
+            else:
+                estimate["mode"] = "exclusive"
+        return estimate
+
+    def _streaming_plan(self, file_path: str, fmt, uncompressed: float, estimated: int) -> dict:
+        """Chunk size chosen so one chunk uses about `chunk_fraction` of the budget."""
+        with open_stream(file_path, fmt.compression, fmt.zip_member) as stream:
+            sample = stream.read(64 * 1024)
+        rows_in_sample = max(1, sample.count(b"\n"))
+        approx_rows = max(1, int(uncompressed * rows_in_sample / max(1, len(sample))))
+        bytes_per_row = max(1, estimated / approx_rows)
+        chunk_budget = self.budget_bytes * self.chunk_fraction
+        chunksize = max(1000, int(chunk_budget / bytes_per_row))
+        return {
+            "mode": "streaming",
+            "chunksize": chunksize,
+            "estimated_bytes": int(min(estimated, chunksize * bytes_per_row)),
+        }
+
+    def reserve_for(self, estimate: dict) -> int:
+        """Bytes held against the budget while the job runs."""
+        if estimate["mode"] == "exclusive":
+            return self.budget_bytes
+        return min(estimate["estimated_bytes"], self.budget_bytes)
+
+    def admit(self, estimate: dict, stopping: Optional[threading.Event] = None) -> bool:
+        """
+        Block until the job fits in the remaining budget. A job is always
+        admitted when nothing else is running, so nothing waits forever.
+        """
+        needed = self.reserve_for(estimate)
+        with self.condition:
+            while self.running and self.in_use + needed > self.budget_bytes:
+                if stopping is not None and stopping.is_set():
+                    return False
+                self.condition.wait(timeout=1.0)
+            self.in_use += needed
+            self.running += 1
+        return True
+
+    def release(self, estimate: dict, observed_peak_bytes: Optional[int] = None):
+        with self.condition:
+            self.in_use -= self.reserve_for(estimate)
+            self.running -= 1
+            self.condition.notify_all()
+        if (
+            observed_peak_bytes
+            and estimate["mode"] == "in_memory"
+            and estimate.get("input_bytes", 0) >= MIN_CACHED_INPUT_BYTES
+        ):
+            uncompressed = estimate["input_bytes"] * COMPRESSION_RATIO.get(estimate["compression"], 4.0)
+            self.schema_cache.update(estimate["schema_key"], observed_peak_bytes / uncompressed)
+
+    def check_intake(self, queued_bytes: int, estimate: dict):
+        """Refuse new work once queued estimates exceed the intake budget."""
+        if queued_bytes and queued_bytes + self.reserve_for(estimate) > self.intake_bytes:
+            raise BackpressureError(
+                f"Intake paused: {queued_bytes // MB} MB of queued work exceeds the "
+                f"{self.intake_bytes // MB} MB intake budget"
+            )
+
+    def snapshot(self) -> dict:
+        with self.condition:
+            return {
+                "budget_bytes": self.budget_bytes,
+                "in_use_bytes": self.in_use,
+                "running_jobs": self.running,
+                "intake_budget_bytes": self.intake_bytes,
+            }
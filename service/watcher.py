@@ -0,0 +1,225 @@
+"""
+Watch mode for INPUT_FILES.
+
+File system events come from inotify on Linux, with directory polling as a
+fallback elsewhere. A file is only dispatched once its size and mtime have
+stayed unchanged for `settle_seconds` (so files still being copied are not
+picked up half-written), and files that settle close together are handed
+to the dispatcher as one batch.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT_HEADER = struct.Struct("iIII")
+
+IGNORED_SUFFIXES = (".tmp", ".part", ".crdownload", ".swp", "~")
+
+
+def _is_candidate(name: str) -> bool:
+    return not name.startswith(".") and not name.endswith(IGNORED_SUFFIXES)
+
+
+class InotifyBackend:
+    """Reports names of files touched in `directory` using Linux inotify."""
+
+    def __init__(self, directory: str):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.directory = directory
+
+    def poll(self, timeout: float) -> List[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names, offset = [], 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Fallback: lists `directory` every interval and reports changed files."""
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        self.directory = directory
+        self.interval = interval
+        self.seen: Dict[str, Tuple[int, int]] = {}
+
+    def poll(self, timeout: float) -> List[str]:
+        time.sleep(min(timeout, self.interval))
+        changed, current = [], {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                current[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                if self.seen.get(entry.name) != current[entry.name]:
+                    changed.append(entry.name)
+        self.seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+class DirectoryWatcher:
+    def __init__(
+        self,
+        directory: str,
+        dispatch: Callable[[List[str]], Optional[List[str]]],
+        settle_seconds: float = 2.0,
+        batch_window_seconds: float = 1.0,
+        max_batch_size: int = 50,
+        poll_interval: float = 1.0,
+        process_existing: bool = True,
+        retry_seconds: float = 30.0,
+    ):
+        # Absolute, so dispatched paths are never re-resolved against INPUT_FILES
+        self.directory = os.path.abspath(directory)
+        self.dispatch = dispatch
+        self.settle_seconds = settle_seconds
+        self.batch_window_seconds = batch_window_seconds
+        self.max_batch_size = max_batch_size
+        self.poll_interval = poll_interval
+        self.process_existing = process_existing
+        self.retry_seconds = retry_seconds
+        # path -> (size, mtime_ns, time the stat last changed)
+        self.pending: Dict[str, Tuple[int, int, float]] = {}
+        # path -> (size, mtime_ns) of the version already dispatched
+        self.dispatched: Dict[str, Tuple[int, int]] = {}
+        self.batch: List[str] = []
+        self.batch_started: Optional[float] = None
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def _make_backend(self):
+        if sys.platform.startswith("linux"):
+            try:
+                backend = InotifyBackend(self.directory)
+                print(f"Watching {self.directory} with inotify.")
+                return backend
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable ({e}); falling back to polling.")
+        print(f"Watching {self.directory} by polling every {self.poll_interval}s.")
+        return PollingBackend(self.directory, self.poll_interval)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="input-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    def _run(self):
+        backend = self._make_backend()
+        if self.process_existing:
+            # One listing at start-up picks up files dropped while we were down
+            for name in os.listdir(self.directory):
+                self._touch(name)
+        try:
+            while not self.stopping.is_set():
+                for name in backend.poll(timeout=min(self.settle_seconds, self.batch_window_seconds) / 2):
+                    self._touch(name)
+                self._check_settled()
+                self._flush_batch()
+        finally:
+            backend.close()
+            self._flush_batch(force=True)
+
+    def _touch(self, name: str):
+        path = os.path.join(self.directory, name)
+        if not _is_candidate(name):
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        if not os.path.isfile(path):
+            return
+        key = (stat.st_size, stat.st_mtime_ns)
+        previous = self.pending.get(path)
+        if previous is None or previous[:2] != key:
+            self.pending[path] = (*key, time.monotonic())
+
+    def _check_settled(self):
+        now = time.monotonic()
+        for path, (size, mtime_ns, changed_at) in list(self.pending.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                del self.pending[path]
+                continue
+            key = (stat.st_size, stat.st_mtime_ns)
+            if key != (size, mtime_ns):
+                # Still being written; restart the settle timer
+                self.pending[path] = (*key, now)
+                continue
+            if now - changed_at < self.settle_seconds:
+                continue
+            del self.pending[path]
+            if self.dispatched.get(path) == key:
+                continue
+            self.dispatched[path] = key
+            if not self.batch:
+                self.batch_started = now
+            self.batch.append(path)
+
+    def _flush_batch(self, force: bool = False):
+        if not self.batch:
+            return
+        window_over = time.monotonic() - self.batch_started >= self.batch_window_seconds
+        if force or window_over or len(self.batch) >= self.max_batch_size:
+            batch, self.batch = self.batch, []
+            print(f"---DISPATCHING {len(batch)} FILE(S) FROM WATCH MODE---")
+            try:
+                # The dispatcher returns the paths it could not queue
+                failed = self.dispatch(batch) or []
+            except Exception as e:
+                print(f"Watch dispatch error: {e}")
+                failed = batch
+            if failed:
+                print(f"Retrying {len(failed)} file(s) in {self.retry_seconds}s.")
+            self._retry_later(failed)
+
+    def _retry_later(self, paths: List[str]):
+        """Put failed paths back in `pending`, to be dispatched again once the retry delay has passed."""
+        retry_at = time.monotonic() + self.retry_seconds
+        for path in paths:
+            key = self.dispatched.pop(path, None)
+            if key is not None:
+                self.pending[path] = (*key, retry_at)
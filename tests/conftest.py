@@ -0,0 +1,6 @@
+import os
+
+# The validation module builds its LLM clients at import time; clients are
+# never called in tests, but they refuse to construct without a key.
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+os.environ.setdefault("GROQ_API_KEY", "test-key")
@@ -0,0 +1,134 @@
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools.Ingest_clean_data import CleaningPlan, DataProcessingTools
+
+INSTRUCTIONS = {
+    "rename_columns": {"unitprice": "unit_price"},
+    "drop_columns": ["country"],
+    "fill_na": {"customerid": 0},
+}
+
+
+def retail_frame(rows: int, duplicate_every: int = 0) -> pd.DataFrame:
+    """Retail-like frame; with `duplicate_every` every n-th row repeats the one before it."""
+    i = np.arange(rows)
+    if duplicate_every:
+        i = i - (i % duplicate_every == 1)
+    ids = pd.Series(i)
+    return pd.DataFrame({
+        "InvoiceNo": ids.astype(str).radd("INV"),
+        "StockCode": (ids % 5000).astype(str).radd("SKU"),
+        "Description": (ids % 800).astype(str).radd("WHITE HANGING HEART T-LIGHT HOLDER "),
+        "Quantity": i % 50,
+        "InvoiceDate": (ids % 9000).astype(str).radd("2010-12-01 08:"),
+        "UnitPrice": (i % 300) * 0.25,
+        "CustomerID": np.where(i % 7 == 0, np.nan, (i % 4000) * 1.0),
+        "Country": (ids % 30).astype(str).radd("Country"),
+    })
+
+
+def extra_peak_bytes(df: pd.DataFrame):
+    """Peak memory allocated by `CleaningPlan.apply` on top of the input frame."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        cleaned = CleaningPlan(INSTRUCTIONS).apply(df)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return cleaned, peak
+
+
+def test_apply_matches_the_cleaning_steps():
+    df = retail_frame(1000, duplicate_every=2)
+    df.loc[3] = np.nan
+    cleaned = CleaningPlan(INSTRUCTIONS).apply(df)
+
+    assert list(cleaned.columns) == [
+        "invoiceno", "stockcode", "description", "quantity", "invoicedate", "unit_price", "customerid",
+    ]
+    expected = df.drop_duplicates().dropna(how="all")
+    assert len(cleaned) == len(expected)
+    assert cleaned["customerid"].notna().all()
+
+
+def test_peak_stays_close_to_input_when_no_rows_are_dropped():
+    df = retail_frame(200_000)
+    input_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    cleaned, peak = extra_peak_bytes(df)
+
+    assert len(cleaned) == len(df)
+    # Renames and drops are metadata-only; the duplicate check dominates
+    assert peak < 0.5 * input_bytes
+
+
+def test_peak_is_bounded_by_surviving_rows_when_rows_are_dropped():
+    df = retail_frame(200_000, duplicate_every=2)
+    input_bytes = int(df.memory_usage(index=True, deep=True).sum())
+    cleaned, peak = extra_peak_bytes(df)
+
+    assert len(cleaned) == len(df) // 2
+    assert peak < input_bytes
+
+
+def test_casts_are_lenient():
+    df = pd.DataFrame({
+        "active": ["yes", "No", " TRUE ", "maybe", None],
+        "qty": ["1", "2.6", "x", None, "4"],
+        "note": ["a", None, 3, "b", "c"],
+    })
+    cleaned = CleaningPlan({
+        "cast_columns": {"active": "bool", "qty": "int", "note": "string", "missing": "int"},
+    }).apply(df)
+
+    assert cleaned["active"].tolist()[:3] == [True, False, True]
+    assert cleaned["active"].isna().tolist()[3:] == [True, True]
+    assert cleaned["qty"].tolist()[:2] == [1, 3]
+    assert str(cleaned["note"].dtype) == "string"
+
+
+def test_a_failing_cast_leaves_the_column_unchanged():
+    df = pd.DataFrame({"a": [1, 2]})
+    cleaned = CleaningPlan({"cast_columns": {"a": "decimal"}}).apply(df)
+    assert cleaned["a"].tolist() == [1, 2]
+
+
+def test_streaming_drops_duplicates_across_chunks(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "sales.csv"
+    # qty parses as float64 in the first chunk (it has a gap) and int64 in the second
+    source.write_text("id,qty\n1,5\n2,6\n3,\n1,5\n2,6\n4,7\n")
+    output = tmp_path / "cleaned.csv"
+
+    written = DataProcessingTools().stream_clean_to_csv(str(source), str(output), chunksize=3)
+
+    assert written == 4
+    assert pd.read_csv(output)["id"].tolist() == [1, 2, 3, 4]
+    assert not list((tmp_path / ".ingest_state").glob("row_keys_*"))
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 100])
+def test_streamed_output_matches_in_memory_cleaning(tmp_path, monkeypatch, chunksize):
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "events.csv"
+    source.write_text("ID,ts,qty\n1,a,5\n1,b,5\n2,c,\n1,d,5\n1,b,5\n,,\n3,e,7\n2,c,\n")
+    instructions = {
+        "rename_columns": {"id": "event_id"},
+        "drop_columns": ["ts"],
+        "fill_na": {"qty": 0},
+        "cast_columns": {"qty": "int"},
+    }
+    tools = DataProcessingTools()
+    expected = tools.ingest_and_clean_data(str(source), instructions)
+    output = tmp_path / "cleaned.csv"
+
+    written = tools.stream_clean_to_csv(str(source), str(output), chunksize, instructions)
+
+    streamed = pd.read_csv(output)
+    assert written == len(expected)
+    assert streamed["event_id"].tolist() == expected["event_id"].tolist() == [1, 1, 2, 1, 3]
+    assert streamed["qty"].tolist() == expected["qty"].tolist()
@@ -0,0 +1,98 @@
+import gzip
+import zipfile
+
+import pandas as pd
+import pytest
+
+from utilits.file_sniffer import SAMPLE_SIZE, _detect_encoding, read_data, sniff_format
+
+FRAME = pd.DataFrame({"id": [1, 2, 3], "name": ["a", "b", "c"]})
+
+
+def test_plain_csv(tmp_path):
+    path = tmp_path / "data.txt"
+    FRAME.to_csv(path, index=False)
+    fmt = sniff_format(str(path))
+    assert (fmt.format, fmt.compression, fmt.delimiter, fmt.has_header) == ("csv", None, ",", True)
+    pd.testing.assert_frame_equal(read_data(str(path)), FRAME)
+
+
+def test_semicolon_delimiter(tmp_path):
+    path = tmp_path / "data.csv"
+    FRAME.to_csv(path, index=False, sep=";")
+    assert sniff_format(str(path)).delimiter == ";"
+
+
+def test_gzipped_csv_is_detected_from_magic_bytes(tmp_path):
+    path = tmp_path / "data.csv.gz"
+    with gzip.open(path, "wt") as f:
+        FRAME.to_csv(f, index=False)
+    fmt = sniff_format(str(path))
+    assert (fmt.format, fmt.compression) == ("csv", "gzip")
+    pd.testing.assert_frame_equal(read_data(str(path)), FRAME)
+
+
+def test_single_member_zip(tmp_path):
+    path = tmp_path / "data.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("inner/data.csv", FRAME.to_csv(index=False))
+    fmt = sniff_format(str(path))
+    assert (fmt.format, fmt.compression, fmt.zip_member) == ("csv", "zip", "inner/data.csv")
+    pd.testing.assert_frame_equal(read_data(str(path)), FRAME)
+
+
+def test_zip_with_several_members_is_rejected(tmp_path):
+    path = tmp_path / "data.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.csv", "x\n1\n")
+        archive.writestr("b.csv", "x\n2\n")
+    with pytest.raises(ValueError):
+        sniff_format(str(path))
+
+
+def test_to_json_output_is_plain_json(tmp_path):
+    path = tmp_path / "data.json"
+    FRAME.to_json(path)
+    assert sniff_format(str(path)).format == "json"
+    pd.testing.assert_frame_equal(read_data(str(path)), FRAME)
+
+
+def test_json_lines(tmp_path):
+    path = tmp_path / "data.json"
+    FRAME.to_json(path, orient="records", lines=True)
+    assert sniff_format(str(path)).format == "jsonl"
+    pd.testing.assert_frame_equal(read_data(str(path)), FRAME)
+
+
+def test_single_flat_record_is_json_lines(tmp_path):
+    path = tmp_path / "one.json"
+    path.write_text('{"id": 1, "name": "a"}\n')
+    assert sniff_format(str(path)).format == "jsonl"
+
+
+def test_headerless_numeric_csv(tmp_path):
+    path = tmp_path / "numbers.csv"
+    path.write_text("1,2.5,3\n4,5.5,6\n7,8.5,9\n")
+    fmt = sniff_format(str(path))
+    assert fmt.has_header is False
+    assert read_data(str(path)).shape == (3, 3)
+
+
+def test_short_latin1_file(tmp_path):
+    path = tmp_path / "names.csv"
+    path.write_bytes(b"name\ncaf\xe9\n")
+    assert sniff_format(str(path)).encoding == "latin-1"
+    assert read_data(str(path))["name"].tolist() == ["caf\xe9"]
+
+
+def test_utf8_character_cut_off_by_the_sample_is_still_utf8():
+    sample = ("a" * (SAMPLE_SIZE - 1)).encode() + "é".encode()[:1]
+    assert _detect_encoding(sample, truncated=True) == "utf-8"
+    assert _detect_encoding(b"caf\xe9", truncated=False) == "latin-1"
+
+
+def test_utf8_bom(tmp_path):
+    path = tmp_path / "bom.csv"
+    path.write_bytes(b"\xef\xbb\xbfid,name\n1,a\n")
+    assert sniff_format(str(path)).encoding == "utf-8-sig"
+    assert list(read_data(str(path)).columns) == ["id", "name"]
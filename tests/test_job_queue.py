@@ -0,0 +1,67 @@
+from service.job_queue import JobQueue
+
+
+def test_jobs_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(db_path)
+    done = queue.submit("INPUT_FILES/a.csv", {"incremental": True})
+    queue.claim()
+    queue.finish(done, "succeeded", outcome="ok", metrics={"rows_cleaned": 3})
+    waiting = queue.submit("INPUT_FILES/b.csv")
+
+    reopened = JobQueue(db_path)
+    assert reopened.get(done)["status"] == "succeeded"
+    assert reopened.get(done)["metrics"] == {"rows_cleaned": 3}
+    assert reopened.get(done)["options"] == {"incremental": True}
+    assert reopened.claim()["id"] == waiting
+
+
+def test_running_jobs_are_requeued_on_restart(tmp_path):
+    db_path = str(tmp_path / "jobs.db")
+    queue = JobQueue(db_path)
+    first = queue.submit("INPUT_FILES/a.csv")
+    second = queue.submit("INPUT_FILES/b.csv")
+    queue.claim()  # interrupted by a crash
+
+    reopened = JobQueue(db_path)
+    assert reopened.get(first)["status"] == "queued"
+    assert reopened.get(first)["started_at"] is None
+    # The interrupted job keeps its place at the front of the queue
+    assert reopened.claim()["id"] == first
+    assert reopened.claim()["id"] == second
+
+
+def test_has_job_matches_file_version_and_ignores_failures(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.submit("INPUT_FILES/a.csv", {"signature": [10, 111]})
+
+    assert queue.has_job("INPUT_FILES/a.csv", [10, 111])
+    assert not queue.has_job("INPUT_FILES/a.csv", [12, 222])
+
+    queue.claim()
+    queue.finish(job_id, "failed", error="boom")
+    assert not queue.has_job("INPUT_FILES/a.csv", [10, 111])
+
+
+def test_queued_bytes_and_counts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    queue.submit("INPUT_FILES/a.csv", {"estimate": {"estimated_bytes": 100}})
+    queue.submit("INPUT_FILES/b.csv", {"estimate": {"estimated_bytes": 50}})
+    queue.claim()
+
+    assert queue.queued_bytes() == 50
+    assert queue.counts() == {"queued": 1, "running": 1}
+
+
+def test_claim_skips_files_with_a_running_job(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    first = queue.submit("INPUT_FILES/a.csv")
+    second = queue.submit("INPUT_FILES/a.csv")
+    other = queue.submit("INPUT_FILES/b.csv")
+
+    assert queue.claim()["id"] == first
+    assert queue.claim()["id"] == other
+    assert queue.claim() is None
+
+    queue.finish(first, "succeeded")
+    assert queue.claim()["id"] == second
@@ -0,0 +1,163 @@
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from service.memory_scheduler import (
+    CLEANING_OVERHEAD,
+    FORMAT_EXPANSION,
+    MB,
+    MIN_CACHED_INPUT_BYTES,
+    SCHEMA_CACHE_MARGIN,
+    BackpressureError,
+    MemoryScheduler,
+    PeakMemoryMonitor,
+    SchemaCache,
+    _rss_bytes,
+)
+
+
+def test_traced_monitor_reports_a_short_lived_peak():
+    monitor = PeakMemoryMonitor(sample_interval=10.0, trace_allocations=True)
+    monitor.start()
+    try:
+        token = monitor.begin()
+        buffer = np.ones(64 * MB, dtype=np.uint8)
+        del buffer
+        observed = monitor.end(token)
+    finally:
+        monitor.stop()
+    # Freed before the job ended and never seen by the RSS sampler
+    assert observed["observed_peak_bytes"] >= 64 * MB
+    assert observed["peak_overlapped"] is False
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.skipif(_rss_bytes() == 0, reason="RSS is read from /proc")
+def test_sampled_rss_peak_without_tracing():
+    monitor = PeakMemoryMonitor(sample_interval=0.01)
+    monitor.start()
+    try:
+        assert not tracemalloc.is_tracing()
+        token = monitor.begin()
+        buffer = np.ones(64 * MB, dtype=np.uint8)
+        time.sleep(0.1)
+        del buffer
+        observed = monitor.end(token)
+    finally:
+        monitor.stop()
+    assert observed["observed_peak_bytes"] >= 48 * MB
+
+
+def test_concurrent_jobs_are_flagged_as_overlapped():
+    monitor = PeakMemoryMonitor(sample_interval=10.0)
+    monitor.start()
+    try:
+        first = monitor.begin()
+        second = monitor.begin()
+        assert monitor.end(second)["peak_overlapped"] is True
+        assert monitor.end(first)["peak_overlapped"] is True
+        alone = monitor.begin()
+        assert monitor.end(alone)["peak_overlapped"] is False
+    finally:
+        monitor.stop()
+
+
+@pytest.fixture
+def schema_cache(tmp_path):
+    return SchemaCache(str(tmp_path / "schema_cache.json"))
+
+
+def write_csv(path, rows):
+    path.write_text("id,name,amount\n" + "".join(f"{i},name-{i},{i * 0.5}\n" for i in range(rows)))
+    return str(path)
+
+
+def test_small_input_runs_in_memory(tmp_path, schema_cache):
+    scheduler = MemoryScheduler(budget_bytes=64 * MB, schema_cache=schema_cache)
+    estimate = scheduler.estimate(write_csv(tmp_path / "small.csv", 100))
+    assert estimate["mode"] == "in_memory"
+    assert estimate["estimate_source"] == "format"
+    assert estimate["estimated_bytes"] == int(estimate["input_bytes"] * FORMAT_EXPANSION["csv"] * CLEANING_OVERHEAD)
+
+
+def test_large_streamable_input_is_streamed_in_chunks(tmp_path, schema_cache):
+    scheduler = MemoryScheduler(budget_bytes=1 * MB, schema_cache=schema_cache)
+    estimate = scheduler.estimate(write_csv(tmp_path / "big.csv", 20_000))
+    assert estimate["mode"] == "streaming"
+    assert estimate["chunksize"] >= 1000
+    assert estimate["estimated_bytes"] < scheduler.budget_bytes
+
+
+def test_large_unstreamable_input_runs_exclusively(tmp_path, schema_cache):
+    path = tmp_path / "big.parquet"
+    path.write_bytes(b"PAR1" + b"\0" * 200_000)
+    scheduler = MemoryScheduler(budget_bytes=1 * MB, schema_cache=schema_cache)
+    estimate = scheduler.estimate(str(path))
+    assert estimate["mode"] == "exclusive"
+    assert scheduler.reserve_for(estimate) == scheduler.budget_bytes
+
+
+def test_incremental_runs_are_never_streamed(tmp_path, schema_cache, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scheduler = MemoryScheduler(budget_bytes=1 * MB, schema_cache=schema_cache)
+    estimate = scheduler.estimate(write_csv(tmp_path / "big.csv", 20_000), {"incremental": True})
+    assert estimate["mode"] == "in_memory"
+
+
+def test_admit_blocks_until_the_budget_frees_up():
+    scheduler = MemoryScheduler(budget_bytes=100, schema_cache=SchemaCache("/nonexistent/cache.json"))
+    estimate = {"mode": "in_memory", "estimated_bytes": 80}
+    assert scheduler.admit(estimate)
+
+    admitted = threading.Event()
+    thread = threading.Thread(target=lambda: scheduler.admit(estimate) and admitted.set())
+    thread.start()
+    assert not admitted.wait(0.2)
+    assert scheduler.snapshot()["in_use_bytes"] == 80
+
+    scheduler.release(estimate)
+    assert admitted.wait(2)
+    thread.join()
+    assert scheduler.snapshot()["running_jobs"] == 1
+
+
+def test_admit_gives_up_when_stopping():
+    scheduler = MemoryScheduler(budget_bytes=100, schema_cache=SchemaCache("/nonexistent/cache.json"))
+    estimate = {"mode": "in_memory", "estimated_bytes": 80}
+    scheduler.admit(estimate)
+    stopping = threading.Event()
+    stopping.set()
+    assert scheduler.admit(estimate, stopping) is False
+
+
+def test_oversized_job_is_admitted_when_nothing_else_runs():
+    scheduler = MemoryScheduler(budget_bytes=100, schema_cache=SchemaCache("/nonexistent/cache.json"))
+    assert scheduler.admit({"mode": "in_memory", "estimated_bytes": 500})
+    assert scheduler.snapshot()["in_use_bytes"] == 100
+
+
+def test_intake_backpressure():
+    scheduler = MemoryScheduler(budget_bytes=100, intake_factor=2, schema_cache=SchemaCache("/nonexistent/cache.json"))
+    estimate = {"mode": "in_memory", "estimated_bytes": 80}
+    scheduler.check_intake(0, {"mode": "in_memory", "estimated_bytes": 1000})  # an empty queue always accepts
+    scheduler.check_intake(100, estimate)
+    with pytest.raises(BackpressureError):
+        scheduler.check_intake(150, estimate)
+
+
+def test_observed_peaks_refine_later_estimates(tmp_path, schema_cache):
+    path = write_csv(tmp_path / "sales.csv", 60_000)
+    scheduler = MemoryScheduler(budget_bytes=4096 * MB, schema_cache=schema_cache)
+    first = scheduler.estimate(path)
+    assert first["input_bytes"] >= MIN_CACHED_INPUT_BYTES
+    scheduler.admit(first)
+    scheduler.release(first, observed_peak_bytes=first["input_bytes"] * 2)
+
+    second = scheduler.estimate(path)
+    assert second["estimate_source"] == "schema_cache"
+    assert second["estimated_bytes"] == int(second["input_bytes"] * 2 * SCHEMA_CACHE_MARGIN)
+    # The cache is persisted for the next service start
+    assert SchemaCache(schema_cache.path).get(first["schema_key"]) == pytest.approx(2.0)
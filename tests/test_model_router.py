@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from utilits.model_router import ModelRouter
+
+
+class FakeChatModel:
+    """Local stand-in for a chat model with a fixed latency and optional failure."""
+
+    def __init__(self, name: str, latency: float = 0.0, fail: bool = False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+
+    def invoke(self, prompt, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f"{self.name} is down")
+        return f"{self.name}: {prompt}"
+
+
+def make_router(*models, **options):
+    return ModelRouter({model.name: model for model in models}, **options)
+
+
+def test_slow_request_is_hedged_and_the_fast_answer_wins():
+    slow, fast = FakeChatModel("slow", latency=1.0), FakeChatModel("fast", latency=0.05)
+    router = make_router(slow, fast, hedge_after=0.1, timeout=5)
+
+    started = time.monotonic()
+    assert router.invoke("hi") == "fast: hi"
+    assert time.monotonic() - started < 0.8
+    assert slow.calls == fast.calls == 1
+
+
+def test_errors_fail_over_to_the_next_model():
+    broken, backup = FakeChatModel("broken", fail=True), FakeChatModel("backup")
+    router = make_router(broken, backup, hedge_after=5, timeout=5)
+
+    assert router.invoke("hi") == "backup: hi"
+    assert router.stats["broken"].error_rate == 1.0
+    # The failed model is cooling down, so the next call starts with the backup
+    assert router.ranked_models()[0] == "backup"
+
+
+def test_timeout_when_no_model_answers():
+    first, second = FakeChatModel("first", latency=1.0), FakeChatModel("second", latency=1.0)
+    router = make_router(first, second, hedge_after=0.05, timeout=0.3)
+
+    with pytest.raises(TimeoutError):
+        router.invoke("hi")
+    assert router.stats["first"].error_rate == 1.0
+    assert router.stats["second"].error_rate == 1.0
+
+
+def test_hedge_loser_is_ranked_behind_the_winner():
+    slow, fast = FakeChatModel("slow", latency=1.0), FakeChatModel("fast", latency=0.05)
+    router = make_router(slow, fast, hedge_after=0.1, timeout=5)
+
+    router.invoke("hi")
+    # The loser is still running, but its elapsed time already counts
+    assert router.stats["slow"].p50 > router.stats["fast"].p50
+    assert router.ranked_models() == ["fast", "slow"]
+
+    fast.calls = slow.calls = 0
+    assert router.invoke("again") == "fast: again"
+    assert (fast.calls, slow.calls) == (1, 0)
+
+
+def test_ranking_prefers_the_lower_p50():
+    a, b = FakeChatModel("a", latency=0.15), FakeChatModel("b", latency=0.01)
+    router = make_router(a, b, hedge_after=5, timeout=5)
+
+    router.invoke("one")  # untried models come first in configured order: "a"
+    router.invoke("two")  # "b" is still untried, so it ranks ahead of "a"
+    assert router.ranked_models() == ["b", "a"]
+
+
+def test_hedge_loser_outcome_still_counts_when_it_fails_later():
+    slow = FakeChatModel("slow", latency=0.4, fail=True)
+    fast = FakeChatModel("fast", latency=0.05)
+    router = make_router(slow, fast, hedge_after=0.1, timeout=5)
+
+    router.invoke("hi")
+    assert router.stats["slow"].p50 is not None
+    assert router.stats["slow"].error_rate == 0.0  # no outcome yet
+
+    time.sleep(0.5)
+    assert router.stats["slow"].error_rate == 1.0
+    assert router.snapshot()["slow"]["calls"] == 1
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import time
+
+import pandas as pd
+import pytest
+
+import agent.agent_workflow
+from service.app import create_app
+from service.ingestion_service import IngestionService
+from service.job_queue import JobQueue
+from service.memory_scheduler import MemoryScheduler, SchemaCache
+
+
+class StubGraph:
+    """Stands in for the compiled graph; records the state of every run."""
+
+    def __init__(self):
+        self.states = []
+
+    def invoke(self, state):
+        self.states.append(state)
+        return {"cleaned_data": pd.DataFrame({"a": [1, 2]}), "is_valid": True, "agent_outcome": "done"}
+
+
+class StubGraphBuilder:
+    builds = 0
+
+    def __init__(self, model_provider="openai"):
+        pass
+
+    def build_graph(self):
+        StubGraphBuilder.builds += 1
+        return StubGraph()
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "INPUT_FILES").mkdir()
+    (tmp_path / "INPUT_FILES" / "sales.csv").write_text("a,b\n1,2\n3,4\n")
+    scheduler = MemoryScheduler(schema_cache=SchemaCache(str(tmp_path / "schema_cache.json")))
+    service = IngestionService(JobQueue(str(tmp_path / "jobs.db")), workers=2, poll_interval=0.05, scheduler=scheduler)
+    service.graph = StubGraph()
+    return service
+
+
+def call(app, method, path, body=None, query=b""):
+    """Runs one HTTP request through the ASGI app and returns (status, json)."""
+    messages = [{"type": "http.request", "body": json.dumps(body).encode() if body is not None else b""}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query}
+    asyncio.run(app(scope, receive, send))
+    return sent[0]["status"], json.loads(sent[1]["body"])
+
+
+def test_submit_and_read_back_a_job(service):
+    app = create_app(service)
+    status, body = call(app, "POST", "/jobs", {"file_path": "sales.csv", "options": {"incremental": False}})
+    assert status == 202
+
+    status, job = call(app, "GET", f"/jobs/{body['job_id']}")
+    assert status == 200
+    assert job["file_path"] == "INPUT_FILES/sales.csv"
+    assert job["status"] == "queued"
+
+    status, jobs = call(app, "GET", "/jobs", query=b"status=queued")
+    assert [j["id"] for j in jobs] == [body["job_id"]]
+
+
+@pytest.mark.parametrize("body", [
+    {"file_path": "sales.csv", "options": ["incremental"]},
+    {"file_path": "sales.csv", "options": {"validation_attempts": 5}},
+    {"file_path": "sales.csv", "options": {"incremental": "yes"}},
+    {"file_path": "sales.csv", "options": {"cleaning_instructions": {"cast_columns": {"a": "complex"}}}},
+    {"file_path": 42},
+    ["sales.csv"],
+    {},
+])
+def test_invalid_requests_are_rejected(service, body):
+    status, payload = call(create_app(service), "POST", "/jobs", body)
+    assert status == 400
+    assert "error" in payload
+
+
+def test_unreadable_zip_is_a_client_error(service, tmp_path):
+    import zipfile
+    with zipfile.ZipFile(tmp_path / "INPUT_FILES" / "two.zip", "w") as archive:
+        archive.writestr("a.csv", "x\n1\n")
+        archive.writestr("b.csv", "x\n2\n")
+    status, _ = call(create_app(service), "POST", "/jobs", {"file_path": "two.zip"})
+    assert status == 400
+
+
+def test_missing_file_and_unknown_routes(service):
+    app = create_app(service)
+    assert call(app, "POST", "/jobs", {"file_path": "nope.csv"})[0] == 404
+    assert call(app, "GET", "/jobs/unknown")[0] == 404
+    assert call(app, "DELETE", "/jobs")[0] == 404
+    assert call(app, "GET", "/health") == (200, {"status": "ok", "ready": True})
+
+
+def test_only_whitelisted_options_reach_the_graph(service):
+    instructions = {"drop_columns": ["b"]}
+    job_id = service.submit("sales.csv", {"cleaning_instructions": instructions}, metadata={"batch_id": "x"})
+    job = service.queue.claim()
+    service.run_job(job, {"mode": "in_memory"})
+
+    state = service.graph.states[0]
+    assert state["file_path"] == "INPUT_FILES/sales.csv"
+    assert state["job_id"] == job_id
+    assert state["cleaning_instructions"]["drop_columns"] == ["b"]
+    assert "batch_id" not in state and "estimate" not in state
+    assert service.queue.get(job_id)["status"] == "succeeded"
+
+
+def test_graph_is_compiled_once_and_shared_by_workers(service, monkeypatch):
+    monkeypatch.setattr(agent.agent_workflow, "GraphBuilder", StubGraphBuilder)
+    StubGraphBuilder.builds = 0
+    job_ids = [service.submit("sales.csv") for _ in range(4)]
+    service.start()
+    try:
+        deadline = time.monotonic() + 10
+        while service.queue.counts().get("succeeded", 0) < len(job_ids) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        service.stop()
+
+    assert service.queue.counts() == {"succeeded": 4}
+    assert StubGraphBuilder.builds == 1
+    assert len(service.graph.states) == 4
+
+
+def test_streamed_jobs_report_every_row_written(service, tmp_path):
+    from utilits.save_document import ExcelSaver
+
+    source = tmp_path / "INPUT_FILES" / "big.csv"
+    source.write_text("a,b\n" + "".join(f"{i},{i}\n" for i in range(25)))
+    saved = ExcelSaver.save_results({"file_path": str(source), "job_id": "abcdef123456", "chunksize": 10})
+    assert saved["rows_written"] == 25
+    assert saved["output_path"] == "OUTPUT_FILES/cleaned_big_abcdef12.csv"
+
+    class StreamingGraph(StubGraph):
+        def invoke(self, state):
+            # cleaned_data holds the first chunk only
+            return {**super().invoke(state), **saved}
+
+    service.graph = StreamingGraph()
+    job_id = service.submit("big.csv")
+    metrics = service.run_job(service.queue.claim(), {"mode": "streaming", "chunksize": 10})
+    assert metrics["rows_cleaned"] == 25
+    assert service.queue.get(job_id)["metrics"]["rows_cleaned"] == 25
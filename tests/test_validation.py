@@ -0,0 +1,114 @@
+import pandas as pd
+import pytest
+
+import tools.Validation_cleaning_data as validation
+from agent.agent_workflow import GraphBuilder
+from tools.Validation_cleaning_data import merge_instructions, sanitize_instructions
+from tools.Validation_schema import CleaningInstructions, LLMValidationResult, ValidationIssue
+
+
+class FakeStructuredLLM:
+    """Returns canned validation verdicts in order, repeating the last one."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.prompts = []
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        return self.results[min(len(self.prompts), len(self.results)) - 1]
+
+
+def invalid(**instructions):
+    return LLMValidationResult(
+        is_valid=False,
+        issues=[ValidationIssue(issue="bad data", severity="error")],
+        cleaning_instructions=CleaningInstructions(**instructions),
+    )
+
+
+VALID = LLMValidationResult(is_valid=True)
+
+
+def test_sanitize_drops_unknown_columns_and_rekeys_to_renamed_names():
+    instructions = CleaningInstructions(
+        rename_columns={"qty": "quantity", "missing": "x", "price": "price"},
+        drop_columns=["notes", "missing"],
+        fill_na={"qty": 0, "missing": 1},
+        cast_columns={"qty": "int", "price": "float"},
+    )
+    sanitized = sanitize_instructions(instructions, ["qty", "price", "notes"])
+
+    assert sanitized.rename_columns == {"qty": "quantity"}
+    assert sanitized.drop_columns == ["notes"]
+    assert sanitized.fill_na == {"quantity": 0}
+    assert sanitized.cast_columns == {"quantity": "int", "price": "float"}
+
+
+def test_merge_chains_renames_onto_earlier_ones():
+    previous = {
+        "rename_columns": {"qty": "quantity"},
+        "drop_columns": ["notes"],
+        "fill_na": {"quantity": 0},
+        "cast_columns": {"quantity": "int"},
+    }
+    # The LLM saw the already renamed "quantity" column
+    new = CleaningInstructions(
+        rename_columns={"quantity": "units"},
+        drop_columns=["comment"],
+        fill_na={"price": 0.0},
+    )
+    merged = merge_instructions(previous, new)
+
+    assert merged["rename_columns"] == {"qty": "units"}
+    assert merged["drop_columns"] == ["comment", "notes"]
+    assert merged["fill_na"] == {"units": 0, "price": 0.0}
+    assert merged["cast_columns"] == {"units": "int"}
+
+
+def test_merge_without_previous_instructions():
+    merged = merge_instructions(None, CleaningInstructions(drop_columns=["a"]))
+    assert merged == {"rename_columns": {}, "drop_columns": ["a"], "fill_na": {}, "cast_columns": {}}
+
+
+@pytest.fixture
+def run_graph(tmp_path, monkeypatch):
+    graph = GraphBuilder().build_graph()
+    source = tmp_path / "sales.csv"
+    source.write_text("Qty,Notes\n1,a\n2,b\n,c\n")
+    monkeypatch.chdir(tmp_path)
+
+    def run(llm):
+        monkeypatch.setattr(validation, "structured_llm", llm)
+        return graph.invoke({"file_path": str(source)})
+
+    return run
+
+
+def test_failing_file_is_valid_after_one_extra_pass(run_graph):
+    llm = FakeStructuredLLM(invalid(rename_columns={"qty": "quantity"}, drop_columns=["notes"]), VALID)
+    result = run_graph(llm)
+
+    assert len(llm.prompts) == 2
+    assert result["is_valid"] is True
+    assert result["validation_attempts"] == 2
+    assert list(result["cleaned_data"].columns) == ["quantity"]
+    assert list(pd.read_csv(result["output_path"]).columns) == ["quantity"]
+
+
+def test_failing_file_escalates_after_one_extra_pass(run_graph):
+    llm = FakeStructuredLLM(invalid(drop_columns=["notes"]), invalid(fill_na={"qty": 0}))
+    result = run_graph(llm)
+
+    assert len(llm.prompts) == 2
+    assert result["is_valid"] is False
+    assert result["agent_outcome"].startswith("Validation failed multiple times")
+
+
+def test_failing_file_without_instructions_escalates_at_once(run_graph):
+    llm = FakeStructuredLLM(invalid())
+    result = run_graph(llm)
+
+    assert len(llm.prompts) == 1
+    assert result["validation_attempts"] == 1
+    assert result["agent_outcome"].startswith("Validation failed multiple times")
@@ -0,0 +1,174 @@
+import os
+import time
+
+import pytest
+
+import service.watcher as watcher_module
+from service.ingestion_service import IngestionService
+from service.job_queue import JobQueue
+from service.memory_scheduler import MemoryScheduler, SchemaCache
+from service.watcher import DirectoryWatcher
+
+
+class FakeDispatch:
+    """Records batches and reports the paths listed in `fail` as not queued."""
+
+    def __init__(self, fail=()):
+        self.batches = []
+        self.fail = set(fail)
+
+    def __call__(self, batch):
+        self.batches.append(list(batch))
+        return [path for path in batch if os.path.basename(path) in self.fail]
+
+
+def make_watcher(directory, dispatch, **options):
+    options = {"settle_seconds": 0.1, "batch_window_seconds": 0.05, "retry_seconds": 0.1, **options}
+    return DirectoryWatcher(str(directory), dispatch, **options)
+
+
+def step(watcher, *names):
+    for name in names:
+        watcher._touch(name)
+    watcher._check_settled()
+    watcher._flush_batch()
+
+
+def test_dispatched_paths_are_absolute(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "drop").mkdir()
+    (tmp_path / "drop" / "a.csv").write_text("x\n1\n")
+    dispatch = FakeDispatch()
+    watcher = make_watcher("drop", dispatch, settle_seconds=0, batch_window_seconds=0)
+
+    step(watcher, "a.csv")
+    assert dispatch.batches == [[str(tmp_path / "drop" / "a.csv")]]
+
+
+def test_file_is_dispatched_only_after_it_settles(tmp_path):
+    path = tmp_path / "a.csv"
+    path.write_text("x\n1\n")
+    dispatch = FakeDispatch()
+    watcher = make_watcher(tmp_path, dispatch, batch_window_seconds=0)
+
+    step(watcher, "a.csv")
+    time.sleep(0.06)
+    path.write_text("x\n1\n2\n")  # still being written: the settle timer restarts
+    step(watcher)
+    time.sleep(0.06)
+    step(watcher)
+    assert dispatch.batches == []
+
+    time.sleep(0.1)
+    step(watcher)
+    assert dispatch.batches == [[str(path)]]
+    # The same version is not dispatched twice
+    step(watcher, "a.csv")
+    time.sleep(0.15)
+    step(watcher)
+    assert len(dispatch.batches) == 1
+
+
+def test_files_settling_together_form_one_batch(tmp_path):
+    for name in ("a.csv", "b.csv", "c.csv", ".hidden.csv", "d.csv.part"):
+        (tmp_path / name).write_text("x\n1\n")
+    dispatch = FakeDispatch()
+    watcher = make_watcher(tmp_path, dispatch, settle_seconds=0, batch_window_seconds=0.2, max_batch_size=2)
+
+    step(watcher, "a.csv", ".hidden.csv", "d.csv.part")
+    assert dispatch.batches == []  # window still open
+    step(watcher, "b.csv", "c.csv")
+    assert [sorted(os.path.basename(p) for p in batch) for batch in dispatch.batches] == [["a.csv", "b.csv", "c.csv"]]
+
+
+def test_failed_paths_are_retried(tmp_path):
+    (tmp_path / "good.csv").write_text("x\n1\n")
+    (tmp_path / "bad.csv").write_text("x\n1\n")
+    dispatch = FakeDispatch(fail={"bad.csv"})
+    watcher = make_watcher(tmp_path, dispatch, settle_seconds=0, batch_window_seconds=0)
+
+    step(watcher, "good.csv", "bad.csv")
+    assert str(tmp_path / "bad.csv") in watcher.pending
+    step(watcher)
+    assert len(dispatch.batches) == 1  # retry delay not over yet
+
+    dispatch.fail.clear()
+    time.sleep(0.15)
+    step(watcher)
+    assert dispatch.batches[1] == [str(tmp_path / "bad.csv")]
+    assert watcher.pending == {}
+
+
+def test_dispatch_exception_retries_the_whole_batch(tmp_path):
+    (tmp_path / "a.csv").write_text("x\n1\n")
+    calls = []
+
+    def flaky(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise RuntimeError("queue unavailable")
+
+    watcher = make_watcher(tmp_path, flaky, settle_seconds=0, batch_window_seconds=0, retry_seconds=0)
+    step(watcher, "a.csv")
+    step(watcher)
+    assert calls == [[str(tmp_path / "a.csv")], [str(tmp_path / "a.csv")]]
+
+
+def test_polling_backend_end_to_end(tmp_path, monkeypatch):
+    def no_inotify(directory):
+        raise OSError("disabled in tests")
+
+    monkeypatch.setattr(watcher_module, "InotifyBackend", no_inotify)
+    dispatch = FakeDispatch()
+    watcher = make_watcher(tmp_path, dispatch, poll_interval=0.02)
+    watcher.start()
+    try:
+        (tmp_path / "a.csv").write_text("x\n1\n")
+        deadline = time.monotonic() + 5
+        while not dispatch.batches and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        watcher.stop()
+    assert dispatch.batches == [[str(tmp_path / "a.csv")]]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scheduler = MemoryScheduler(schema_cache=SchemaCache(str(tmp_path / "schema_cache.json")))
+    return IngestionService(JobQueue(str(tmp_path / "jobs.db")), scheduler=scheduler)
+
+
+def test_submit_batch_skips_versions_queued_before_a_restart(service, tmp_path):
+    drop = tmp_path / "drop"
+    drop.mkdir()
+    (drop / "a.csv").write_text("x\n1\n")
+    (drop / "b.csv").write_text("x\n2\n")
+    paths = [str(drop / "a.csv"), str(drop / "b.csv")]
+
+    assert service.submit_batch(paths) == []
+    assert service.queue.counts() == {"queued": 2}
+
+    # After a restart the watcher lists the directory again
+    restarted = IngestionService(JobQueue(str(tmp_path / "jobs.db")), scheduler=service.scheduler)
+    assert restarted.submit_batch(paths) == []
+    assert restarted.queue.counts() == {"queued": 2}
+
+    # A new version of a file is queued again
+    (drop / "a.csv").write_text("x\n1\n3\n")
+    restarted.submit_batch(paths)
+    assert restarted.queue.counts() == {"queued": 3}
+    # Watch submissions keep their absolute path
+    assert {job["file_path"] for job in restarted.queue.list()} == set(paths)
+
+
+def test_submit_batch_returns_failed_paths_and_continues(service, tmp_path):
+    import zipfile
+    (tmp_path / "good.csv").write_text("x\n1\n")
+    with zipfile.ZipFile(tmp_path / "bad.zip", "w") as archive:
+        archive.writestr("a.csv", "x\n1\n")
+        archive.writestr("b.csv", "x\n2\n")
+    paths = [str(tmp_path / "bad.zip"), str(tmp_path / "missing.csv"), str(tmp_path / "good.csv")]
+
+    assert service.submit_batch(paths) == [str(tmp_path / "bad.zip")]
+    assert [job["file_path"] for job in service.queue.list()] == [str(tmp_path / "good.csv")]
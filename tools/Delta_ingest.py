@@ -0,0 +1,219 @@
+"""
+Append-aware delta ingestion for growing files.
+
+For every input file a watermark records how many bytes (and rows) have
+already been processed, a fingerprint of the header line and of the bytes
+just before the watermark, plus an index of the row keys written so far.
+A later run seeks straight to the watermark, parses only the new complete
+lines, drops rows whose key is already in the index and hands just those
+rows on for validation and appending to the existing output.
+
+Only uncompressed CSV and JSON-lines files in a byte-oriented encoding can
+be read this way; other inputs fall back to a full read.
+"""
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import pandas as pd
+
+from tools.Ingest_clean_data import DataProcessingTools, row_keys
+from utilits.file_sniffer import sniff_format
+
+DELTA_FORMATS = ("csv", "jsonl")
+DELTA_ENCODINGS = ("utf-8", "utf-8-sig", "latin-1")
+TAIL_FINGERPRINT_BYTES = 256
+
+
+def _fingerprint(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+class WatermarkStore:
+    """Watermarks and row-key index per input file, kept in SQLite."""
+
+    def __init__(self, db_path: str = ".ingest_state/watermarks.db"):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                file_path TEXT PRIMARY KEY,
+                byte_offset INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                header_fingerprint TEXT NOT NULL,
+                tail_fingerprint TEXT NOT NULL,
+                output_path TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS row_keys (
+                file_path TEXT NOT NULL,
+                key INTEGER NOT NULL,
+                PRIMARY KEY (file_path, key)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def get(self, file_path: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT byte_offset, row_count, header_fingerprint, tail_fingerprint, output_path "
+                "FROM watermarks WHERE file_path = ?",
+                (file_path,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("byte_offset", "row_count", "header_fingerprint", "tail_fingerprint", "output_path")
+        return dict(zip(keys, row))
+
+    def known_keys(self, file_path: str, keys) -> set:
+        """Subset of `keys` already present in the index for this file."""
+        found = set()
+        keys = [int(k) for k in keys]
+        with self.lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT key FROM row_keys WHERE file_path = ? AND key IN ({placeholders})",
+                    (file_path, *chunk),
+                ).fetchall()
+                found.update(row[0] for row in rows)
+        return found
+
+    def commit(self, file_path: str, watermark: dict, new_keys, output_path: str, reset: bool = False):
+        """Advance the watermark and extend the key index in one transaction."""
+        with self.lock, self.conn:
+            if reset:
+                self.conn.execute("DELETE FROM row_keys WHERE file_path = ?", (file_path,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO row_keys (file_path, key) VALUES (?, ?)",
+                ((file_path, int(k)) for k in new_keys),
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    file_path,
+                    watermark["byte_offset"],
+                    watermark["row_count"],
+                    watermark["header_fingerprint"],
+                    watermark["tail_fingerprint"],
+                    output_path,
+                    time.time(),
+                ),
+            )
+
+
+class DeltaIngestor:
+    def __init__(self, store: Optional[WatermarkStore] = None):
+        self.store = store or WatermarkStore()
+        self.processing_tools = DataProcessingTools()
+
+    @staticmethod
+    def output_path_for(file_path: str, output_dir: str = "OUTPUT_FILES") -> str:
+        name = os.path.basename(file_path).split(".")[0]
+        return os.path.join(output_dir, f"cleaned_{name}.csv")
+
+    def read_delta(self, file_path: str, cleaning_instructions: dict = None) -> dict:
+        """
+        Returns the cleaned new rows of `file_path` together with the pending
+        watermark. Nothing is recorded until `commit` is called after the
+        rows have been saved.
+        """
+        fmt = sniff_format(file_path)
+        if fmt.compression is not None or fmt.format not in DELTA_FORMATS or fmt.encoding not in DELTA_ENCODINGS:
+            print(f"Delta ingestion not possible for {fmt.format} ({fmt.compression}); reading the full file.")
+            cleaned = self.processing_tools.ingest_and_clean_data(file_path, cleaning_instructions)
+            return {"cleaned_data": cleaned}
+
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            header_line = f.readline()
+            header_end = f.tell()
+            previous = self.store.get(file_path)
+            resume = self._can_resume(f, previous, header_line, file_size)
+            start = previous["byte_offset"] if resume else 0
+            f.seek(start)
+            data = f.read(file_size - start)
+
+        # Only complete lines; a partially written last line waits for the next run
+        complete = data[:data.rfind(b"\n") + 1]
+        end = start + len(complete)
+        if resume:
+            print(f"---DELTA INGEST: {len(complete)} new bytes after offset {start}---")
+        else:
+            print("---DELTA INGEST: no usable watermark, processing the whole file---")
+
+        has_header = fmt.format == "csv" and fmt.has_header
+        names = None
+        if has_header:
+            names = next(csv.reader([header_line.decode(fmt.encoding).rstrip("\r\n")], delimiter=fmt.delimiter))
+            if not resume:
+                complete = complete[header_end:]
+
+        raw_df = self._parse(complete, fmt, names)
+        new_rows = len(raw_df)
+        # Keys identify the raw rows: cleaning may drop the very columns that
+        # tell two rows apart, and validation can change the instructions
+        # from one run to the next.
+        raw_keys = pd.Series(row_keys(raw_df), index=raw_df.index)
+        cleaned = self.processing_tools.clean_data(raw_df, cleaning_instructions)
+        del raw_df
+
+        # The cleaning plan keeps the raw index labels of the surviving rows
+        keys = raw_keys.loc[cleaned.index].to_numpy()
+        del raw_keys
+        if resume and len(keys):
+            known = self.store.known_keys(file_path, keys)
+            if known:
+                mask = ~pd.Series(keys).isin(list(known)).to_numpy()
+                cleaned, keys = cleaned.loc[mask], keys[mask]
+                print(f"Dropped {int((~mask).sum())} rows already ingested.")
+
+        with open(file_path, "rb") as f:
+            f.seek(max(0, end - TAIL_FINGERPRINT_BYTES))
+            tail = f.read(min(end, TAIL_FINGERPRINT_BYTES))
+        watermark = {
+            "byte_offset": end,
+            "row_count": (previous["row_count"] if resume else 0) + new_rows,
+            "header_fingerprint": _fingerprint(header_line),
+            "tail_fingerprint": _fingerprint(tail),
+            "keys": keys,
+            "reset": not resume,
+        }
+        return {"cleaned_data": cleaned, "delta": watermark}
+
+    def _can_resume(self, f, previous: Optional[dict], header_line: bytes, file_size: int) -> bool:
+        """The file must still start and continue exactly as it did at the watermark."""
+        if previous is None or previous["header_fingerprint"] != _fingerprint(header_line):
+            return False
+        offset = previous["byte_offset"]
+        if file_size < offset:
+            return False
+        f.seek(max(0, offset - TAIL_FINGERPRINT_BYTES))
+        return _fingerprint(f.read(min(offset, TAIL_FINGERPRINT_BYTES))) == previous["tail_fingerprint"]
+
+    @staticmethod
+    def _parse(data: bytes, fmt, names) -> pd.DataFrame:
+        if not data.strip():
+            return pd.DataFrame(columns=names)
+        if fmt.format == "jsonl":
+            return pd.read_json(io.BytesIO(data), lines=True, encoding=fmt.encoding)
+        return pd.read_csv(
+            io.BytesIO(data),
+            sep=fmt.delimiter,
+            encoding=fmt.encoding,
+            header=None,
+            names=names,
+        )
+
+    def commit(self, file_path: str, watermark: dict, output_path: str):
+        self.store.commit(file_path, watermark, watermark["keys"], output_path, reset=watermark["reset"])
+        print(f"Watermark for {file_path} advanced to byte {watermark['byte_offset']} ({watermark['row_count']} rows).")
@@ -1,9 +1,9 @@
 """
 Data ingestion and cleaning functions.
 """
-import pandas as pd
 import os
 from tools.Typedict_state import AgentState
+from utilits.file_sniffer import sniff_format
 
 
 
@@ -20,23 +20,14 @@ class Ingest_clean_data:
         print("---INGESTING DATA---")
         file_path = state.get('file_path')
         # Always use INPUT_FILES directory
-        if not file_path.startswith("INPUT_FILES"):  # avoid double prefix
+        if not file_path.startswith("INPUT_FILES") and not os.path.isabs(file_path):  # avoid double prefix
             file_path = os.path.join("INPUT_FILES", file_path)
         try:
-            # Handle different file types
-            file_ext = file_path.split('.')[-1].lower()
-            if file_ext == 'csv':
-                raw_df = pd.read_csv(file_path)
-            elif file_ext in ['xlsx', 'xls']:
-                raw_df = pd.read_excel(file_path)
-            elif file_ext == 'json':
-                raw_df = pd.read_json(file_path)
-            elif file_ext == 'parquet':
-                raw_df = pd.read_parquet(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
-            return {"raw_data": raw_df}
+            # The cleaning step reads the file itself (whole, in chunks or
+            # just the appended tail), so only check here that it can be read.
+            fmt = sniff_format(file_path)
+            print(f"Detected {fmt.format} input ({fmt.compression or 'uncompressed'}).")
+            return {"file_path": file_path}
         except Exception as e:
             print(f"Error ingesting data: {e}")
             return {"agent_outcome": f"Failed to ingest data: {e}"}
-
@@ -1,4 +1,9 @@
+import os
+import sqlite3
+import tempfile
+import numpy as np
 import pandas as pd
+from utilits.file_sniffer import iter_chunks, read_data
 
 
 
@@ -7,7 +12,164 @@ import pandas as pd
 
 
 
+# Cleaning relies on copy-on-write, which is always on from pandas 3. Older
+# versions get it switched on once here: the option is process-wide, so
+# toggling it per call would race between concurrent worker threads.
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+_BOOL_VALUES = {
+    "true": True, "t": True, "yes": True, "y": True, "1": True, "1.0": True,
+    "false": False, "f": False, "no": False, "n": False, "0": False, "0.0": False,
+}
+
+
+def _cast(series: pd.Series, dtype: str) -> pd.Series:
+    """Casts a column leniently; values that cannot be converted become missing."""
+    if dtype == "int":
+        return pd.to_numeric(series, errors="coerce").round().astype("Int64")
+    if dtype == "float":
+        return pd.to_numeric(series, errors="coerce").astype("float64")
+    if dtype == "datetime":
+        return pd.to_datetime(series, errors="coerce")
+    if dtype == "bool":
+        if pd.api.types.is_bool_dtype(series):
+            return series.astype("boolean")
+        text = series.astype("string").str.strip().str.lower()
+        return text.map(_BOOL_VALUES, na_action="ignore").astype("boolean")
+    if dtype == "string":
+        return series.astype("string")
+    raise ValueError(f"Unsupported cast type: {dtype}")
+
+
+def _canonical(series: pd.Series) -> pd.Series:
+    """Text form of a column that does not depend on the dtype pandas inferred for it."""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+        return series.astype("string")
+    numeric = series if pd.api.types.is_numeric_dtype(series) else pd.to_numeric(series, errors="coerce")
+    numeric = numeric.astype("float64")
+    # 1, 1.0 and "1" all become "1.0"; anything non-numeric keeps its text
+    return series.astype("string").mask(numeric.notna(), numeric.astype("string"))
+
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit row hashes, as signed integers so they fit SQLite. Rows hash the
+    same whether a chunk parsed a column as int64, float64 or text.
+    """
+    keys = np.zeros(len(df), dtype="uint64")
+    for i in range(df.shape[1]):
+        column_hash = pd.util.hash_pandas_object(_canonical(df.iloc[:, i]), index=False).to_numpy()
+        keys = keys * np.uint64(1000003) ^ column_hash
+    return keys.view("int64")
+
+
+class RowKeyIndex:
+    """
+    Row keys seen so far, kept in a temporary SQLite file rather than a
+    Python set, so deduplicating a streamed file holds one chunk's keys in
+    memory however large the file is. The file is removed on `close`.
+    """
+
+    def __init__(self, directory: str = ".ingest_state"):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(prefix="row_keys_", suffix=".db", dir=directory)
+        os.close(fd)
+        self.conn = sqlite3.connect(self.path)
+        # Scratch data: nothing to recover after a crash
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        self.conn.execute("CREATE TABLE seen (key INTEGER PRIMARY KEY)")
+        self.conn.execute("CREATE TABLE batch (pos INTEGER PRIMARY KEY, key INTEGER NOT NULL)")
+
+    def add_new(self, keys: np.ndarray) -> np.ndarray:
+        """Records `keys` and returns a mask of those not seen in earlier calls or earlier in `keys`."""
+        keys = np.asarray(keys, dtype="int64")
+        new = ~pd.Series(keys).duplicated().to_numpy()
+        with self.conn:
+            self.conn.execute("DELETE FROM batch")
+            self.conn.executemany("INSERT INTO batch VALUES (?, ?)", enumerate(keys.tolist()))
+            seen = [row[0] for row in self.conn.execute("SELECT pos FROM batch WHERE key IN (SELECT key FROM seen)")]
+            self.conn.execute("INSERT OR IGNORE INTO seen SELECT key FROM batch")
+        new[seen] = False
+        return new
+
+    def close(self):
+        self.conn.close()
+        os.remove(self.path)
+
+
+class CleaningPlan:
+    """
+    Cleaning steps merged into a single pass over the frame.
+
+    All renames are folded into one column mapping and all drops into one
+    column set, so renaming and dropping only rewrite column metadata. Row
+    filtering (duplicates and all-empty rows) is computed as one boolean mask
+    and applied with a single take, and fill_na runs in place on the result.
+    Casts touch only the columns they name.
+    """
+
+    def __init__(self, cleaning_instructions: dict = None):
+        cleaning_instructions = cleaning_instructions or {}
+        self.rename_columns = dict(cleaning_instructions.get('rename_columns') or {})
+        self.drop_columns = set(cleaning_instructions.get('drop_columns') or [])
+        self.fill_na = cleaning_instructions.get('fill_na') or None
+        self.cast_columns = dict(cleaning_instructions.get('cast_columns') or {})
+
+    def final_columns(self, columns) -> list:
+        """Column names after lower-casing and the instruction renames."""
+        return [self.rename_columns.get(str(col).lower(), str(col).lower()) for col in columns]
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Input plus surviving rows is the most this plan holds at once
+        # Row mask is computed on the full set of columns, exactly as the
+        # unplanned chain did before any columns were dropped.
+        keep_rows = ~df.duplicated().to_numpy()
+        # Column by column, so no boolean frame the size of the input is built
+        any_present = np.zeros(len(df), dtype=bool)
+        for i in range(df.shape[1]):
+            any_present |= df.iloc[:, i].notna().to_numpy()
+        keep_rows &= any_present
+        del any_present
+
+        # Single merged rename (lower-case + instruction renames) and drop;
+        # under copy-on-write neither touches the column data.
+        new_names = self.final_columns(df.columns)
+        keep_cols = [i for i, name in enumerate(new_names) if name not in self.drop_columns]
+        if len(keep_cols) != len(new_names):
+            df = df.iloc[:, keep_cols]
+        else:
+            df = df.copy(deep=False)
+        df.columns = [new_names[i] for i in keep_cols]
+
+        # The only data copy: one take of the surviving rows
+        if not keep_rows.all():
+            df = df.loc[keep_rows]
+        del keep_rows
+
+        if self.fill_na is not None:
+            df.fillna(self.fill_na, inplace=True)
+
+        for col, dtype in self.cast_columns.items():
+            if col in df.columns:
+                try:
+                    df[col] = _cast(df[col], dtype)
+                except Exception as e:
+                    # One bad instruction must not fail the whole run;
+                    # the column stays as it was for validation to flag.
+                    print(f"Could not cast column '{col}' to {dtype}: {e}")
+        return df
+
+
 class DataProcessingTools:
+    def clean_data(self, df: pd.DataFrame, cleaning_instructions: dict = None) -> pd.DataFrame:
+        """
+        Applies basic cleaning plus any cleaning_instructions as one merged plan.
+        """
+        return CleaningPlan(cleaning_instructions).apply(df)
+
     def ingest_and_clean_data(self, file_path: str, cleaning_instructions: dict = None) -> pd.DataFrame:
         """
         Ingests data from a file and performs cleaning operations.
@@ -15,27 +177,37 @@ class DataProcessingTools:
         Applies cleaning_instructions when provided from validation feedback.
         """
         try:
-            file_ext = file_path.split('.')[-1].lower()
-            if file_ext == 'csv':
-                df = pd.read_csv(file_path)
-            elif file_ext in ['xlsx', 'xls']:
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError(f"Unsupported file format: {file_ext}")
-
-            # Basic cleaning
-            df = df.drop_duplicates().rename(columns=str.lower).dropna(how='all')
-            
-            # Apply validation feedback instructions if provided
-            if cleaning_instructions:
-                if 'rename_columns' in cleaning_instructions:
-                    df = df.rename(columns=cleaning_instructions['rename_columns'])
-                if 'drop_columns' in cleaning_instructions:
-                    df = df.drop(columns=cleaning_instructions['drop_columns'], errors='ignore')
-                if 'fill_na' in cleaning_instructions:
-                    df = df.fillna(cleaning_instructions['fill_na'])
-            
-            return df   
+            # No local reference to the raw frame, so it is released as soon
+            # as the plan has taken the surviving rows.
+            return self.clean_data(read_data(file_path), cleaning_instructions)
         except Exception as e:
             print(f"Data processing error: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def stream_clean_to_csv(self, file_path: str, output_path: str, chunksize: int, cleaning_instructions: dict = None) -> int:
+        """
+        Cleans `file_path` chunk by chunk and writes the result to `output_path`,
+        so only one chunk is in memory at a time. Duplicates across chunks are
+        caught with an on-disk index of raw row hashes, so the output matches
+        cleaning the whole file at once. Returns the number of rows written.
+        """
+        plan = CleaningPlan(cleaning_instructions)
+        index = RowKeyIndex()
+        rows_written = 0
+        try:
+            for i, chunk in enumerate(iter_chunks(file_path, chunksize)):
+                # Keyed on the raw rows, like the in-memory duplicate check,
+                # not on rows that have already lost their dropped columns
+                raw_keys = pd.Series(row_keys(chunk), index=chunk.index)
+                cleaned = plan.apply(chunk)
+                del chunk
+                new = index.add_new(raw_keys.loc[cleaned.index].to_numpy())
+                del raw_keys
+                if not new.all():
+                    cleaned = cleaned.loc[new]
+                cleaned.to_csv(output_path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+                rows_written += len(cleaned)
+        finally:
+            index.close()
+        print(f"Streamed {rows_written} cleaned rows to {output_path}.")
+        return rows_written
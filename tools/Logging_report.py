@@ -0,0 +1,33 @@
+import json
+import os
+import threading
+import time
+
+
+class RunReport:
+    """
+    Appends one JSON line per processed job to OUTPUT_FILES/run_report.jsonl,
+    including the scheduler's estimated and the observed peak memory.
+    """
+
+    def __init__(self, report_path: str = os.path.join("OUTPUT_FILES", "run_report.jsonl")):
+        self.report_path = report_path
+        self.lock = threading.Lock()
+
+    def record(self, entry: dict):
+        entry = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), **entry}
+        estimated = entry.get("estimated_peak_bytes")
+        observed = entry.get("observed_peak_bytes")
+        if estimated and observed:
+            entry["estimate_error_ratio"] = round(observed / estimated, 3)
+        os.makedirs(os.path.dirname(self.report_path) or ".", exist_ok=True)
+        with self.lock, open(self.report_path, "a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+        print(
+            f"Run report: {entry.get('file_path')} [{entry.get('mode')}] "
+            f"estimated {_mb(estimated)} MB, observed {_mb(observed)} MB"
+        )
+
+
+def _mb(value) -> str:
+    return f"{value / (1024 * 1024):.1f}" if value else "n/a"
@@ -4,9 +4,19 @@ import pandas as pd
 
 
 
-class AgentState(TypedDict):
+class AgentState(TypedDict, total=False):
     file_path: str
-    raw_data: pd.DataFrame
     cleaned_data: pd.DataFrame
     exceptions: pd.DataFrame
-    agent_outcome: str
\ No newline at end of file
+    agent_outcome: str
+    is_valid: bool
+    llm_feedback: str
+    cleaning_instructions: dict
+    has_new_instructions: bool
+    validation_attempts: int
+    incremental: bool
+    delta: dict
+    chunksize: int
+    job_id: str
+    output_path: str
+    rows_written: int
@@ -2,47 +2,100 @@
 from tools.Typedict_state import AgentState
 import pandas as pd
 from tools.Ingest_clean_data import DataProcessingTools
+from tools.Delta_ingest import DeltaIngestor
+from tools.Validation_schema import CleaningInstructions, LLMValidationResult
+from prompt_library.prompt import VALIDATION_PROMPT
 from utilits.model_loader import ModelLoader
+from utilits.file_sniffer import iter_chunks
 
-# Initialize LLM model loader
-llm = ModelLoader(model_provider="openai").load_llm()
+# Route validation calls across all configured providers
+llm = ModelLoader().load_router()
+structured_llm = llm.with_structured_output(LLMValidationResult)
 
 def clean_and_validate_data(state: AgentState):
     """
     Node to clean and validate data using DataProcessingTools
     """
     print("---CLEANING DATA---")
+    if state.get("incremental"):
+        # Only the rows appended since the last run are parsed and cleaned
+        return DeltaIngestor().read_delta(state["file_path"], state.get("cleaning_instructions"))
     processing_tools = DataProcessingTools()
-    cleaned_df = processing_tools.ingest_and_clean_data(
-        state["file_path"], 
-        state.get("cleaning_instructions")
-    )
+    if state.get("chunksize"):
+        # Streaming mode: validate the first chunk; save_results streams the
+        # whole file through the same cleaning plan.
+        chunks = iter_chunks(state["file_path"], state["chunksize"])
+        first_chunk = next(chunks, pd.DataFrame())
+        chunks.close()
+        cleaned_df = processing_tools.clean_data(first_chunk, state.get("cleaning_instructions"))
+    else:
+        cleaned_df = processing_tools.ingest_and_clean_data(
+            state["file_path"], 
+            state.get("cleaning_instructions")
+        )
     return {"cleaned_data": cleaned_df}
 
+def sanitize_instructions(instructions: CleaningInstructions, columns) -> CleaningInstructions:
+    """
+    Drops instructions that reference columns not present in the cleaned data
+    and expresses drop/fill/cast in terms of the renamed columns, so they can
+    be applied to the raw file in a single cleaning pass.
+    """
+    columns = set(columns)
+    renames = {old: new for old, new in instructions.rename_columns.items() if old in columns and old != new}
+    renamed = lambda col: renames.get(col, col)
+    return CleaningInstructions(
+        rename_columns=renames,
+        drop_columns=[renamed(col) for col in instructions.drop_columns if col in columns],
+        fill_na={renamed(col): value for col, value in instructions.fill_na.items() if col in columns},
+        cast_columns={renamed(col): dtype for col, dtype in instructions.cast_columns.items() if col in columns},
+    )
+
+def merge_instructions(previous: dict, new: CleaningInstructions) -> dict:
+    """
+    Combines instructions from an earlier validation pass with new ones.
+    New renames are chained onto the earlier ones since the LLM saw the
+    already renamed columns.
+    """
+    previous = previous or {}
+    renames = dict(previous.get("rename_columns") or {})
+    for old, new_name in new.rename_columns.items():
+        source = next((src for src, dst in renames.items() if dst == old), old)
+        renames[source] = new_name
+    renamed = lambda col: new.rename_columns.get(col, col)
+    return {
+        "rename_columns": renames,
+        "drop_columns": sorted({renamed(c) for c in previous.get("drop_columns") or []} | set(new.drop_columns)),
+        "fill_na": {**{renamed(c): v for c, v in (previous.get("fill_na") or {}).items()}, **new.fill_na},
+        "cast_columns": {**{renamed(c): t for c, t in (previous.get("cast_columns") or {}).items()}, **new.cast_columns},
+    }
+
 def llm_validate_data(cleaned_df: pd.DataFrame) -> dict:
     """
-    Uses the LLM to validate the cleaned DataFrame and generate feedback.
+    Uses the LLM to validate the cleaned DataFrame and generate structured
+    feedback with cleaning instructions.
     """
     try:
         # Take a sample of the cleaned data for prompt brevity
         sample_json = cleaned_df.head(10).to_json()
-        prompt = f"""
-You are a data quality expert. Given the following data sample (in JSON), identify any data quality issues (missing columns, missing values, duplicates, etc.) and suggest cleaning steps:
-{sample_json}
-"""
-        llm_feedback = llm.invoke(prompt)
+        prompt = VALIDATION_PROMPT.format(columns=list(cleaned_df.columns), sample_json=sample_json)
+        result = structured_llm.invoke(prompt)
         print("---LLM VALIDATION FEEDBACK---")
-        print(llm_feedback.content)
-        # Optionally, you can parse the LLM response for structured feedback
+        print(result.model_dump_json(indent=2))
+        instructions = sanitize_instructions(result.cleaning_instructions, cleaned_df.columns)
+        # Only blocking issues fail the file, whatever the overall flag says
+        is_valid = result.is_valid and not any(issue.severity == "error" for issue in result.issues)
         return {
-            "is_valid": "no issues" in llm_feedback.content.lower(),
-            "llm_feedback": llm_feedback.content
+            "is_valid": is_valid,
+            "llm_feedback": "; ".join(issue.issue for issue in result.issues) or "No issues found",
+            "instructions": instructions,
         }
     except Exception as e:
         print(f"LLM validation error: {e}")
         return {
             "is_valid": False,
-            "llm_feedback": f"LLM validation failed: {e}"
+            "llm_feedback": f"LLM validation failed: {e}",
+            "instructions": CleaningInstructions(),
         }
 
 def validate_data(state: AgentState):
@@ -51,7 +104,19 @@ def validate_data(state: AgentState):
     """
     print("---VALIDATING DATA WITH LLM---")
     cleaned_df = state["cleaned_data"]
+    if state.get("incremental") and cleaned_df.empty:
+        # Nothing new since the last watermark; only the watermark moves
+        return {"agent_outcome": "No new rows to validate", "is_valid": True, "llm_feedback": "No new rows"}
     llm_result = llm_validate_data(cleaned_df)
+    instructions = llm_result.pop("instructions")
+    update = {
+        "validation_attempts": state.get("validation_attempts", 0) + 1,
+        **llm_result,
+    }
     if llm_result["is_valid"]:
-        return {"agent_outcome": "Validation successful (LLM)", **llm_result}
-    return {"agent_outcome": "Validation failed (LLM)", **llm_result}
\ No newline at end of file
+        return {"agent_outcome": "Validation successful (LLM)", **update}
+    # Without new instructions another cleaning pass would produce the same data
+    update["has_new_instructions"] = not instructions.is_empty()
+    if update["has_new_instructions"]:
+        update["cleaning_instructions"] = merge_instructions(state.get("cleaning_instructions"), instructions)
+    return {"agent_outcome": "Validation failed (LLM)", **update}
@@ -0,0 +1,27 @@
+from typing import Dict, List, Literal, Optional, Union
+from pydantic import BaseModel, Field
+
+
+
+
+class ValidationIssue(BaseModel):
+    column: Optional[str] = Field(default=None, description="Column the issue applies to, if any")
+    issue: str = Field(description="Short description of the data quality problem")
+    severity: Literal["error", "warning"] = Field(description="'error' blocks the file, 'warning' does not")
+
+
+class CleaningInstructions(BaseModel):
+    rename_columns: Dict[str, str] = Field(default_factory=dict, description="Current column name -> new column name")
+    drop_columns: List[str] = Field(default_factory=list, description="Columns to remove")
+    fill_na: Dict[str, Union[str, int, float, bool]] = Field(default_factory=dict, description="Column -> value used for missing entries")
+    cast_columns: Dict[str, Literal["int", "float", "string", "datetime", "bool"]] = Field(default_factory=dict, description="Column -> target type")
+
+    def is_empty(self) -> bool:
+        return not (self.rename_columns or self.drop_columns or self.fill_na or self.cast_columns)
+
+
+class LLMValidationResult(BaseModel):
+    """Structured verdict returned by the LLM for a cleaned data sample."""
+    is_valid: bool = Field(description="True when the sample has no blocking issues")
+    issues: List[ValidationIssue] = Field(default_factory=list)
+    cleaning_instructions: CleaningInstructions = Field(default_factory=CleaningInstructions)
@@ -1,20 +1,49 @@
 from pydrive.auth import GoogleAuth
 from pydrive.drive import GoogleDrive
 import os
+import threading
 
-# Use persistent credentials so authentication is only required the first time
-gauth = GoogleAuth()
-gauth.LoadClientConfigFile("utilits/client_secrets.json")
-gauth.LoadCredentialsFile("utilits/credentials.json")
-if gauth.credentials is None:
-    gauth.LocalWebserverAuth()
-    gauth.SaveCredentialsFile("utilits/credentials.json")
-elif gauth.access_token_expired:
-    gauth.Refresh()
-    gauth.SaveCredentialsFile("utilits/credentials.json")
-else:
-    gauth.Authorize()
-drive = GoogleDrive(gauth)
+_drive = None
+_drive_lock = threading.Lock()
+
+
+def get_drive():
+    """
+    Authenticate once per process and return the cached GoogleDrive client.
+    Uses persistent credentials so authentication is only required the first time.
+    """
+    global _drive
+    with _drive_lock:
+        if _drive is None:
+            _drive = _authenticate()
+    return _drive
+
+
+def _authenticate():
+    gauth = GoogleAuth()
+    gauth.LoadClientConfigFile("utilits/client_secrets.json")
+    gauth.LoadCredentialsFile("utilits/credentials.json")
+    if gauth.credentials is None:
+        gauth.LocalWebserverAuth()
+        gauth.SaveCredentialsFile("utilits/credentials.json")
+    elif gauth.access_token_expired:
+        gauth.Refresh()
+        gauth.SaveCredentialsFile("utilits/credentials.json")
+    else:
+        gauth.Authorize()
+    return GoogleDrive(gauth)
+
+
+def upload_file_to_drive(file_path, folder_id, new_name=None):
+    """
+    Uploads a single file to the given Google Drive folder.
+    """
+    drive = get_drive()
+    file_drive = drive.CreateFile({'title': new_name or os.path.basename(file_path), 'parents': [{'id': folder_id}]})
+    file_drive.SetContentFile(file_path)
+    file_drive.Upload()
+    print(f"Uploaded {file_path} to Google Drive as {file_drive['title']}")
+    return file_drive['id']
 
 
 
@@ -35,7 +64,7 @@ def Uplod_latest_file_from_tool(Upload_dir):
     latest_file = max(files, key=os.path.getmtime)
     file_name = os.path.basename(latest_file)
     # Upload to Google Drive root
-    file_drive = drive.CreateFile({'title': file_name, 'parents': [{'id': 'root'}]})
+    file_drive = get_drive().CreateFile({'title': file_name, 'parents': [{'id': 'root'}]})
     file_drive.SetContentFile(latest_file)
     file_drive.Upload()
     print(f"Uploaded {latest_file} to Google Drive as {file_drive['title']}")
@@ -53,7 +82,7 @@ def download_latest_file_from_drive_root(download_dir):
     if not os.path.exists(download_dir):
         os.makedirs(download_dir)
     # List all files in the root (no parents filter)
-    file_list = drive.ListFile({'q': "'root' in parents and trashed=false"}).GetList()
+    file_list = get_drive().ListFile({'q': "'root' in parents and trashed=false"}).GetList()
     if not file_list:
         print("No files found in the Google Drive root.")
         return None
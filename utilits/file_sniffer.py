@@ -0,0 +1,292 @@
+"""
+Content-based file format and compression sniffing.
+
+The parser is chosen from the file's magic bytes and a small header sample
+instead of its extension, so `.csv.gz`, `.jsonl`, `.zst` or mislabelled files
+are read correctly. Compressed inputs are decompressed as a stream straight
+into the pandas parser; nothing is written to disk.
+"""
+import bz2
+import codecs
+import csv
+import gzip
+import io
+import json
+import lzma
+import zipfile
+from dataclasses import dataclass
+from typing import IO, Optional
+
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # zstd support is optional
+    zstandard = None
+
+
+SAMPLE_SIZE = 64 * 1024
+
+# Magic numbers checked against the first bytes of the file
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd"),
+]
+ZIP_MAGIC = b"PK\x03\x04"
+PARQUET_MAGIC = b"PAR1"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy .xls
+
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+@dataclass
+class FileFormat:
+    format: str                       # csv, json, jsonl, excel, parquet
+    compression: Optional[str] = None  # gzip, bz2, xz, zstd, zip
+    zip_member: Optional[str] = None
+    encoding: str = "utf-8"
+    delimiter: str = ","
+    has_header: bool = True
+
+
+def _compression_from_magic(head: bytes) -> Optional[str]:
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _is_excel_zip(names) -> bool:
+    return "[Content_Types].xml" in names and any(n.startswith("xl/") for n in names)
+
+
+class _ZipMemberStream(io.BufferedReader):
+    """Stream over one zip member that also closes the archive when closed."""
+
+    def __init__(self, archive: zipfile.ZipFile, member: str):
+        self._archive = archive
+        try:
+            super().__init__(archive.open(member))
+        except Exception:
+            archive.close()
+            raise
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._archive.close()
+
+
+def open_stream(file_path: str, compression: Optional[str] = None, zip_member: Optional[str] = None) -> IO[bytes]:
+    """
+    Open a binary stream over the decompressed content of `file_path`.
+    Decompression happens lazily while the stream is read.
+    """
+    if compression is None:
+        return open(file_path, "rb")
+    if compression == "gzip":
+        return gzip.open(file_path, "rb")
+    if compression == "bz2":
+        return bz2.open(file_path, "rb")
+    if compression == "xz":
+        return lzma.open(file_path, "rb")
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd input requires the 'zstandard' package")
+        raw = open(file_path, "rb")
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    if compression == "zip":
+        return _ZipMemberStream(zipfile.ZipFile(file_path), zip_member)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+def _read_sample(stream: IO[bytes], size: int = SAMPLE_SIZE) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _detect_encoding(sample: bytes, truncated: bool = False) -> str:
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off by the sample size is still utf-8;
+        # in a sample holding the whole file the same bytes are just invalid.
+        if truncated and e.reason == "unexpected end of data" and e.start >= len(sample) - 3:
+            return "utf-8"
+        return "latin-1"
+
+
+def _is_number(value: str) -> bool:
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _looks_like_json_lines(text: str, truncated: bool) -> bool:
+    """
+    JSON-lines needs at least two non-empty lines that each parse as an object.
+    A single line only counts when its values are all scalars (one record);
+    a one-line document such as pandas' default to_json() output is plain JSON.
+    """
+    # Ignore a last line that may have been cut off by the sample size
+    complete = text.rsplit("\n", 1)[0] if truncated and "\n" in text else text
+    lines = [line for line in complete.splitlines() if line.strip()]
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return False
+        if not isinstance(record, dict):
+            return False
+        records.append(record)
+    if len(records) >= 2:
+        return True
+    return len(records) == 1 and not any(isinstance(v, (dict, list)) for v in records[0].values())
+
+
+def _sniff_text(sample: bytes, fmt: FileFormat) -> FileFormat:
+    truncated = len(sample) >= SAMPLE_SIZE
+    fmt.encoding = _detect_encoding(sample, truncated)
+    text = sample.decode(fmt.encoding, errors="ignore").lstrip("\ufeff")
+    stripped = text.lstrip()
+
+    if stripped.startswith("["):
+        fmt.format = "json"
+        return fmt
+    if stripped.startswith("{"):
+        fmt.format = "jsonl" if _looks_like_json_lines(stripped, truncated) else "json"
+        return fmt
+
+    fmt.format = "csv"
+    # Drop a possibly truncated last line before handing the sample to the sniffer
+    complete = text.rsplit("\n", 1)[0] if "\n" in text else text
+    try:
+        dialect = csv.Sniffer().sniff(complete, delimiters=",;\t|")
+        fmt.delimiter = dialect.delimiter
+    except csv.Error:
+        fmt.delimiter = ","
+    # csv.Sniffer.has_header misfires on all-text columns, so only treat the
+    # first row as data when the sniffer agrees and it contains numeric cells.
+    first_row = next(csv.reader(io.StringIO(complete), delimiter=fmt.delimiter), [])
+    try:
+        sniffed_header = csv.Sniffer().has_header(complete)
+    except csv.Error:
+        sniffed_header = True
+    fmt.has_header = sniffed_header or not any(_is_number(cell) for cell in first_row)
+    return fmt
+
+
+def sniff_format(file_path: str) -> FileFormat:
+    """
+    Detect compression, container format, encoding, delimiter and header row
+    of `file_path` from its content.
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(8)
+
+    fmt = FileFormat(format="csv", compression=_compression_from_magic(head))
+
+    if head.startswith(ZIP_MAGIC):
+        with zipfile.ZipFile(file_path) as archive:
+            names = archive.namelist()
+            if _is_excel_zip(names):
+                fmt.format = "excel"
+                return fmt
+            members = [n for n in names if not n.endswith("/")]
+            if len(members) != 1:
+                raise ValueError(f"Expected exactly one file inside zip archive, found {len(members)}")
+            fmt.compression = "zip"
+            fmt.zip_member = members[0]
+
+    with open_stream(file_path, fmt.compression, fmt.zip_member) as stream:
+        sample = _read_sample(stream)
+
+    if sample.startswith(PARQUET_MAGIC):
+        fmt.format = "parquet"
+    elif sample.startswith(OLE_MAGIC):
+        fmt.format = "excel"
+    elif sample.startswith(ZIP_MAGIC):
+        fmt.format = "excel"
+    else:
+        fmt = _sniff_text(sample, fmt)
+    return fmt
+
+
+def read_data(file_path: str, fmt: Optional[FileFormat] = None, **read_kwargs) -> pd.DataFrame:
+    """
+    Read `file_path` into a DataFrame using the sniffed format.
+    Extra keyword arguments are passed to the pandas reader.
+    """
+    fmt = fmt or sniff_format(file_path)
+    print(f"Detected format: {fmt.format} (compression={fmt.compression}, encoding={fmt.encoding}, delimiter={fmt.delimiter!r})")
+
+    with open_stream(file_path, fmt.compression, fmt.zip_member) as stream:
+        if fmt.format == "csv":
+            return pd.read_csv(
+                stream,
+                sep=fmt.delimiter,
+                encoding=fmt.encoding,
+                header=0 if fmt.has_header else None,
+                **read_kwargs,
+            )
+        if fmt.format in ("json", "jsonl"):
+            text = io.TextIOWrapper(stream, encoding=fmt.encoding)
+            return pd.read_json(text, lines=fmt.format == "jsonl", **read_kwargs)
+        # Excel and parquet readers need random access; buffer the decompressed
+        # bytes in memory rather than spilling to a temporary file.
+        if fmt.compression is not None:
+            stream = io.BytesIO(stream.read())
+        if fmt.format == "excel":
+            return pd.read_excel(stream, **read_kwargs)
+        if fmt.format == "parquet":
+            return pd.read_parquet(stream, **read_kwargs)
+    raise ValueError(f"Unsupported file format: {fmt.format}")
+
+
+STREAMABLE_FORMATS = ("csv", "jsonl")
+
+
+def iter_chunks(file_path: str, chunksize: int, fmt: Optional[FileFormat] = None):
+    """
+    Yield DataFrames of at most `chunksize` rows, keeping only one chunk in
+    memory. Supported for csv and JSON-lines input, compressed or not.
+    """
+    fmt = fmt or sniff_format(file_path)
+    if fmt.format not in STREAMABLE_FORMATS:
+        raise ValueError(f"Chunked reading is not supported for {fmt.format} files")
+
+    with open_stream(file_path, fmt.compression, fmt.zip_member) as stream:
+        if fmt.format == "csv":
+            reader = pd.read_csv(
+                stream,
+                sep=fmt.delimiter,
+                encoding=fmt.encoding,
+                header=0 if fmt.has_header else None,
+                chunksize=chunksize,
+            )
+        else:
+            text = io.TextIOWrapper(stream, encoding=fmt.encoding)
+            reader = pd.read_json(text, lines=True, chunksize=chunksize)
+        with reader:
+            yield from reader
@@ -3,6 +3,7 @@ from dotenv import load_dotenv
 from typing import Literal, Optional, Any
 from pydantic import BaseModel, Field
 from utilits.config_loader import load_config
+from utilits.model_router import ModelRouter
 from langchain_groq import ChatGroq
 from langchain_openai import ChatOpenAI
 
@@ -25,22 +26,47 @@ class ModelLoader(BaseModel):
     class Config:
         arbitrary_types_allowed = True
     
+    def _build_llm(self, name: str):
+        """Build the chat model for the `llm.<name>` entry of the config."""
+        provider = self.config["llm"][name]["provider"]
+        model_name = self.config["llm"][name]["model_name"]
+        if provider == "groq":
+            print("Loading LLM from Groq..............")
+            groq_api_key = os.getenv("GROQ_API_KEY")
+            return ChatGroq(model=model_name, api_key=groq_api_key)
+        elif provider == "openai":
+            print("Loading LLM from OpenAI..............")
+            openai_api_key = os.getenv("OPENAI_API_KEY")
+            return ChatOpenAI(model_name=model_name, api_key=openai_api_key)
+        raise ValueError(f"Unsupported model provider: {provider}")
+
     def load_llm(self):
         """
         Load and return the LLM model.
         """
         print("LLM loading...")
         print(f"Loading model from provider: {self.model_provider}")
-        if self.model_provider == "groq":
-            print("Loading LLM from Groq..............")
-            groq_api_key = os.getenv("GROQ_API_KEY")
-            model_name = self.config["llm"]["groq"]["model_name"]
-            llm=ChatGroq(model=model_name, api_key=groq_api_key)
-        elif self.model_provider == "openai":
-            print("Loading LLM from OpenAI..............")
-            openai_api_key = os.getenv("OPENAI_API_KEY")
-            model_name = self.config["llm"]["openai"]["model_name"]
-            llm = ChatOpenAI(model_name="o4-mini", api_key=openai_api_key)
-        
-        return llm
-    
\ No newline at end of file
+        return self._build_llm(self.model_provider)
+
+    def load_router(self) -> ModelRouter:
+        """
+        Load every provider listed in the config behind a latency-aware router.
+        Providers that cannot be constructed (e.g. missing API key) are skipped.
+        """
+        print("LLM router loading...")
+        models = {}
+        for name in self.config["llm"]:
+            try:
+                models[name] = self._build_llm(name)
+            except Exception as e:
+                print(f"Skipping provider {name}: {e}")
+        routing = self.config.config.get("routing", {})
+        return ModelRouter(
+            models,
+            hedge_after=routing.get("hedge_after_seconds"),
+            min_hedge_after=routing.get("min_hedge_after_seconds", 2.0),
+            timeout=routing.get("timeout_seconds", 60.0),
+            window=routing.get("window", 50),
+            max_error_rate=routing.get("max_error_rate", 0.5),
+            cooldown=routing.get("cooldown_seconds", 30.0),
+        )
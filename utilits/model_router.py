@@ -0,0 +1,227 @@
+"""
+Latency-aware routing between the configured LLM providers.
+
+Every call goes to the fastest healthy model (by rolling p50 latency). If it
+has not answered by the hedge deadline the next model is started in
+parallel and whichever answers first wins; errors and timeouts fail over to
+the next model straight away.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Optional
+
+
+class LatencyStats:
+    """Rolling latency and error window for one model."""
+
+    def __init__(self, window: int = 50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.cooldown_until = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, latency: Optional[float], ok: bool, cooldown: float = 0.0):
+        with self.lock:
+            self.outcomes.append(ok)
+            if ok:
+                if latency is not None:
+                    self.latencies.append(latency)
+            elif cooldown:
+                self.cooldown_until = time.monotonic() + cooldown
+
+    def record_latency(self, latency: float):
+        """Latency sample without an outcome; the outcome is recorded when the call ends."""
+        with self.lock:
+            self.latencies.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self.lock:
+            values = sorted(self.latencies)
+        if not values:
+            return None
+        index = min(len(values) - 1, int(round(q * (len(values) - 1))))
+        return values[index]
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.percentile(0.50)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.percentile(0.95)
+
+    @property
+    def error_rate(self) -> float:
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return 1 - sum(self.outcomes) / len(self.outcomes)
+
+    def is_healthy(self, max_error_rate: float, min_samples: int = 3) -> bool:
+        if time.monotonic() < self.cooldown_until:
+            return False
+        with self.lock:
+            samples = len(self.outcomes)
+        return samples < min_samples or self.error_rate <= max_error_rate
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            calls = len(self.outcomes)
+        return {"p50": self.p50, "p95": self.p95, "error_rate": self.error_rate, "calls": calls}
+
+
+class ModelRouter:
+    """
+    Routes `invoke` calls across several chat models, hedging slow requests
+    and failing over on errors or timeouts.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, Any],
+        hedge_after: Optional[float] = None,
+        min_hedge_after: float = 2.0,
+        timeout: float = 60.0,
+        window: int = 50,
+        max_error_rate: float = 0.5,
+        cooldown: float = 30.0,
+        stats: Optional[Dict[str, LatencyStats]] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ):
+        if not models:
+            raise ValueError("ModelRouter needs at least one model")
+        self.models = models
+        self.hedge_after = hedge_after
+        self.min_hedge_after = min_hedge_after
+        self.timeout = timeout
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.window = window
+        self.stats = stats if stats is not None else {name: LatencyStats(window) for name in models}
+        self._record_lock = threading.Lock()
+        self.executor = executor or ThreadPoolExecutor(max_workers=4 * len(models), thread_name_prefix="llm-router")
+
+    def with_structured_output(self, schema, **kwargs) -> "ModelRouter":
+        """Router over the structured-output variants, sharing latency stats."""
+        return ModelRouter(
+            {name: model.with_structured_output(schema, **kwargs) for name, model in self.models.items()},
+            hedge_after=self.hedge_after,
+            min_hedge_after=self.min_hedge_after,
+            timeout=self.timeout,
+            window=self.window,
+            max_error_rate=self.max_error_rate,
+            cooldown=self.cooldown,
+            stats=self.stats,
+            executor=self.executor,
+        )
+
+    def ranked_models(self) -> list:
+        """Healthy models by p50 latency (untried first), then unhealthy ones by error rate."""
+        def latency_key(name):
+            p50 = self.stats[name].p50
+            return 0.0 if p50 is None else p50
+
+        healthy = [n for n in self.models if self.stats[n].is_healthy(self.max_error_rate)]
+        unhealthy = [n for n in self.models if n not in healthy]
+        return sorted(healthy, key=latency_key) + sorted(unhealthy, key=lambda n: self.stats[n].error_rate)
+
+    def hedge_deadline(self, name: str) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        p95 = self.stats[name].p95
+        if p95 is None:
+            # No history yet: hedge a third of the way to the timeout
+            return max(self.min_hedge_after, self.timeout / 3)
+        return max(self.min_hedge_after, p95)
+
+    def _record(self, attempt: dict, ok: bool, latency: float):
+        # An attempt's outcome is recorded once: on completion, or as a
+        # timeout if the router gives up on it first.
+        with self._record_lock:
+            if attempt["recorded"]:
+                return
+            attempt["recorded"] = True
+            if attempt["latency_recorded"]:
+                latency = None
+        self.stats[attempt["name"]].record(latency, ok, 0.0 if ok else self.cooldown)
+
+    def _record_loser(self, attempt: dict, elapsed: float):
+        # Another attempt answered first. The loser's latency is at least its
+        # elapsed time, so record that now; its outcome is still recorded by
+        # the done callback once it succeeds or fails.
+        with self._record_lock:
+            if attempt["recorded"] or attempt["latency_recorded"]:
+                return
+            attempt["latency_recorded"] = True
+        self.stats[attempt["name"]].record_latency(elapsed)
+
+    def _start(self, name: str, prompt, kwargs, attempts: dict):
+        attempt = {"name": name, "start": time.monotonic(), "recorded": False, "latency_recorded": False}
+        future = self.executor.submit(self.models[name].invoke, prompt, **kwargs)
+        attempts[future] = attempt
+        future.add_done_callback(
+            lambda f: self._record(attempt, f.exception() is None, time.monotonic() - attempt["start"])
+        )
+        return future
+
+    def invoke(self, prompt, **kwargs):
+        candidates = self.ranked_models()
+        attempts = {}
+        errors = []
+        started = time.monotonic()
+        pending = {self._start(candidates.pop(0), prompt, kwargs, attempts)}
+
+        while True:
+            remaining = self.timeout - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            if not pending:
+                if not candidates:
+                    break
+                name = candidates.pop(0)
+                print(f"LLM router: failing over to {name}")
+                pending.add(self._start(name, prompt, kwargs, attempts))
+                continue
+
+            wait_for = remaining
+            if candidates:
+                newest = attempts[max(pending, key=lambda f: attempts[f]["start"])]
+                hedge_at = newest["start"] + self.hedge_deadline(newest["name"])
+                wait_for = min(remaining, max(0.0, hedge_at - time.monotonic()))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = attempts[future]["name"]
+                # The done callback may not have run yet; record here so the
+                # stats are current by the time this call returns.
+                self._record(attempts[future], future.exception() is None, time.monotonic() - attempts[future]["start"])
+                if future.exception() is None:
+                    # Record the losers' elapsed time now, or the slower model
+                    # would keep ranking first until it eventually answers.
+                    now = time.monotonic()
+                    for other, attempt in attempts.items():
+                        if not other.done():
+                            self._record_loser(attempt, now - attempt["start"])
+                    if len(attempts) > 1:
+                        print(f"LLM router: answered by {name} after {time.monotonic() - started:.2f}s")
+                    return future.result()
+                print(f"LLM router: {name} failed: {future.exception()}")
+                errors.append(f"{name}: {future.exception()}")
+
+            # Fail over straight after an error, hedge once the deadline passes
+            if candidates and (done or time.monotonic() >= hedge_at):
+                name = candidates.pop(0)
+                print(f"LLM router: {'failing over' if done else 'hedging slow request'} to {name}")
+                pending.add(self._start(name, prompt, kwargs, attempts))
+
+        # Attempts still running count as timeouts
+        for future, attempt in attempts.items():
+            if not future.done():
+                self._record(attempt, False, self.timeout)
+                errors.append(f"{attempt['name']}: timed out after {self.timeout}s")
+        raise TimeoutError(f"No LLM provider answered successfully: {'; '.join(errors)}")
+
+    def snapshot(self) -> dict:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
@@ -1,9 +1,13 @@
 
 from tools.Typedict_state import AgentState
+import csv
 import os
+from tools.Delta_ingest import DeltaIngestor
+from tools.Ingest_clean_data import DataProcessingTools
 from utilits.Googledrive_api import upload_file_to_drive
 
 class ExcelSaver:
+    @staticmethod
     def save_results(state: AgentState, drive_folder_id=None):
         """
         Node to save the final, processed data and upload to Google Drive if folder_id is provided.
@@ -14,18 +18,68 @@ class ExcelSaver:
 
         output_dir = "OUTPUT_FILES"
         os.makedirs(output_dir, exist_ok=True)
-        cleaned_path = os.path.join(output_dir, "cleaned_data.csv")
+        cleaned_path, exceptions_path = ExcelSaver.output_paths(state, output_dir)
+        upload_name = os.path.basename(cleaned_path) if state.get('job_id') else "cleaned_data_uploaded.csv"
 
-        if cleaned_df is not None:
+        update = {}
+        delta = state.get('delta')
+        if state.get('chunksize'):
+            # Streaming mode: only a sample is in the state; stream the full file
+            update["rows_written"] = DataProcessingTools().stream_clean_to_csv(
+                state['file_path'], cleaned_path, state['chunksize'], state.get('cleaning_instructions')
+            )
+            if drive_folder_id:
+                upload_file_to_drive(cleaned_path, drive_folder_id, new_name=upload_name)
+        elif delta is not None and cleaned_df is not None:
+            cleaned_path = ExcelSaver.append_delta(state['file_path'], cleaned_df, delta, output_dir)
+            update["rows_written"] = len(cleaned_df)
+        elif cleaned_df is not None:
             cleaned_df.to_csv(cleaned_path, index=False)
+            update["rows_written"] = len(cleaned_df)
             print(f"Cleaned data saved to {cleaned_path}.")
             # Upload to Google Drive if folder_id is provided
             if drive_folder_id:
-                upload_file_to_drive(cleaned_path, drive_folder_id, new_name="cleaned_data_uploaded.csv")
+                upload_file_to_drive(cleaned_path, drive_folder_id, new_name=upload_name)
 
         if exceptions_df is not None:
-            exceptions_path = os.path.join(output_dir, "exceptions.csv")
             exceptions_df.to_csv(exceptions_path, index=False)
             print(f"Exceptions saved to {exceptions_path}.")
 
-        return {"agent_outcome": "Processing complete."}
\ No newline at end of file
+        if state.get('chunksize') or cleaned_df is not None:
+            update["output_path"] = cleaned_path
+            return {"agent_outcome": f"Processing complete. Cleaned data saved to {cleaned_path}.", **update}
+        return {"agent_outcome": "Processing complete.", **update}
+
+    @staticmethod
+    def output_paths(state: AgentState, output_dir: str = "OUTPUT_FILES") -> tuple:
+        """
+        Cleaned-data and exceptions paths for this run. Service jobs get files
+        named after the input and the job, so concurrent jobs never share an
+        output; single CLI runs keep the original fixed names.
+        """
+        job_id = state.get('job_id')
+        if not job_id:
+            return os.path.join(output_dir, "cleaned_data.csv"), os.path.join(output_dir, "exceptions.csv")
+        stem = os.path.basename(state['file_path']).split(".")[0]
+        suffix = f"{stem}_{job_id[:8]}"
+        return os.path.join(output_dir, f"cleaned_{suffix}.csv"), os.path.join(output_dir, f"exceptions_{suffix}.csv")
+
+    @staticmethod
+    def append_delta(file_path: str, cleaned_df, delta: dict, output_dir: str = "OUTPUT_FILES") -> str:
+        """
+        Appends the new rows of an incremental run to the file's existing
+        output (rewriting it when the watermark was reset), then advances
+        the watermark.
+        """
+        output_path = DeltaIngestor.output_path_for(file_path, output_dir)
+        append = not delta["reset"] and os.path.exists(output_path)
+        if append:
+            # Keep the column order of the rows already written
+            with open(output_path, newline="") as f:
+                existing_columns = next(csv.reader(f), None)
+            if existing_columns:
+                cleaned_df = cleaned_df.reindex(columns=existing_columns)
+        cleaned_df.to_csv(output_path, mode="a" if append else "w", header=not append, index=False)
+        print(f"{'Appended' if append else 'Wrote'} {len(cleaned_df)} rows to {output_path}.")
+        DeltaIngestor().commit(file_path, delta, output_path)
+        return output_path
\ No newline at end of file